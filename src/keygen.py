@@ -1,35 +1,44 @@
+import time
+_module_started = time.perf_counter() # --profile reports everything from here to main() as import time
 import argparse
 import secrets
 import string
 import sys
-import pyperclip
 import configparser
 import os
 import math
-import json
-import csv
-import requests
 import re
-import uuid
-import base64
-import time
-import getpass
-from itertools import cycle
-
-try:
-    import ulid
-    import nanoid
-    from cryptography.fernet import Fernet
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-    from cryptography.hazmat.backends import default_backend
-except ImportError as e:
-    print(f"Error: A required library is missing: {e}. Please run the installer or 'pip install -r requirements.txt'.")
-    sys.exit(1)
+import io
+import mmap
+import struct
+import threading
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from importlib import import_module
+from collections import Counter, deque
+from contextlib import closing, nullcontext, redirect_stderr
+from collections.abc import Sequence
+from itertools import accumulate, cycle, repeat
+
+if sys.version_info < (3, 9): sys.exit("KeyConstruct needs Python 3.9 or newer.")
+
+# Heavy and third-party modules (requests, pyperclip, cryptography, json, csv, ...) are imported
+# where they are used, so each run only pays for the features it actually touches.
+def require(module_name):
+    if module_name in sys.modules: return sys.modules[module_name]
+    try:
+        with profile_stage('import'):
+            return import_module(module_name)
+    except ImportError as e:
+        print(f"Error: A required library is missing: {e}. Please run the installer or 'pip install -r requirements.txt'.")
+        sys.exit(1)
 
 # --- Configuration ---
+KEYGEN_VERSION = '2.0'
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE_PATH = os.path.join(SCRIPT_DIR, 'keygen_config.ini')
+STATS_DB_PATH = os.path.join(SCRIPT_DIR, 'keygen_stats.db')
 DICTIONARIES_DIR = os.path.join(SCRIPT_DIR, 'dictionaries')
 DESKTOP_PATH = os.path.join(os.path.expanduser('~'), 'Desktop')
 
@@ -50,7 +59,198 @@ current_theme = 'default'
 color_map = THEMES[current_theme]
 
 # --- Global State ---
-session_generation_count = 0
+session_stats = {} # mode -> Counter of keys/bytes/seconds/timed_keys for this process, flushed to the stats store on exit
+_session_lock = threading.Lock()
+
+# --- Profiling ---
+# Instrumented stages report (stage, seconds, calls, items, nbytes) to every hook in profile_hooks. With no
+# hook attached a stage costs one list check, so the instrumentation stays in place on normal runs.
+# --profile attaches a StageProfiler; embedding code can attach its own callable the same way:
+#   profiler = add_profile_hook(StageProfiler())
+#   KeyGenerator(wifi=True).generate_many(100000)
+#   print(profiler.report())
+profile_hooks = []
+
+def add_profile_hook(hook):
+    profile_hooks.append(hook)
+    return hook
+
+def remove_profile_hook(hook):
+    if hook in profile_hooks: profile_hooks.remove(hook)
+
+def emit_profile(stage, seconds, calls=1, items=0, nbytes=0):
+    for hook in profile_hooks: hook(stage, seconds, calls, items, nbytes)
+
+class profile_stage:
+    # Times a `with` block as one call of `stage`. Set .items / .nbytes inside the block to report volume.
+    __slots__ = ('stage', 'items', 'nbytes', 'started')
+
+    def __init__(self, stage, items=0, nbytes=0):
+        self.stage, self.items, self.nbytes = stage, items, nbytes
+
+    def __enter__(self):
+        self.started = time.perf_counter() if profile_hooks else None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.started is not None: emit_profile(self.stage, time.perf_counter() - self.started, 1, self.items, self.nbytes)
+
+class StageProfiler:
+    # Profile hook that totals every stage. Stages nest (load_words and apply_case run inside generate,
+    # encrypt inside write), so their shares of the wall time can add up to more than 100%.
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.stages = {} # stage -> Counter of seconds/calls/items/bytes, in first-seen order
+
+    def __call__(self, stage, seconds, calls=1, items=0, nbytes=0):
+        with self.lock:
+            totals = self.stages.setdefault(stage, Counter())
+            totals['seconds'] += seconds
+            totals['calls'] += calls
+            totals['items'] += items
+            totals['bytes'] += nbytes
+
+    def report(self):
+        wall = time.perf_counter() - self.started
+        with self.lock:
+            stages = [{'stage': stage, 'seconds': totals['seconds'], 'calls': totals['calls'], 'items': totals['items'],
+                       'bytes': totals['bytes'], 'share': totals['seconds'] / wall if wall else 0.0} for stage, totals in self.stages.items()]
+        generated, written = self.stages.get('generate', Counter()), self.stages.get('write', Counter())
+        return {'wall_seconds': wall, 'keys': generated['items'], 'bytes_written': written['bytes'],
+                'peak_memory_kib': peak_memory_kib(), 'stages': stages}
+
+def peak_memory_kib():
+    # Peak resident set size of this process plus its finished worker processes; None where unavailable.
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1024 if sys.platform == 'darwin' else 1 # ru_maxrss is in bytes on macOS, KiB elsewhere
+    return sum(resource.getrusage(who).ru_maxrss / scale for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+
+def print_profile_report(report, json_path=None):
+    status_file = sys.stderr # stdout may be carrying keys
+    print_colored("--- Profile ---", 'header', status_file)
+    print_colored(f"{'stage':<16}{'seconds':>12}{'share':>9}{'calls':>12}{'items':>14}{'bytes':>16}", 'header', status_file)
+    for row in sorted(report['stages'], key=lambda row: row['seconds'], reverse=True):
+        print_colored(f"{row['stage']:<16}{row['seconds']:>12.6f}{row['share']:>9.1%}{row['calls']:>12,}{row['items']:>14,}{row['bytes']:>16,}", 'benchmark', status_file)
+    peak = f"{report['peak_memory_kib']:,.0f} KiB" if report['peak_memory_kib'] is not None else "n/a"
+    print_colored(f"Wall time {report['wall_seconds']:.6f} s, {report['keys']:,} keys generated, "
+                  f"{report['bytes_written']:,} bytes written, peak memory {peak}.", 'info', status_file)
+    if json_path:
+        import json
+        text = json.dumps(report, indent=2)
+        if json_path == '-':
+            print(text)
+        else:
+            with open(json_path, 'w', encoding='utf-8') as f: f.write(text + "\n")
+            print_colored(f"Profile saved to {json_path}", 'info', status_file)
+
+# --- Bulk Random Engine ---
+GENERATION_BATCH_SIZE = 10000 # Keys produced per engine call in the main loop
+_numpy = False # Resolved on first use; None when NumPy is not installed
+
+def get_numpy():
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
+
+# --seed/--insecure-fast replace the CSPRNG with SeededRandom, a NumPy PCG64 stream per batch seeded from
+# (seed, batch number), so the output depends only on the seed and never on --workers or timing. Engine
+# functions check for its `rng` attribute and draw indices straight from the generator, skipping the
+# byte-level rejection sampling the secure path needs. Never use it for real secrets.
+SEEDED_EPOCH_MS = 1_700_000_000_000 # Clock for time-based IDs in seeded runs (2023-11-14T22:13:20Z)
+SEEDED_NUMPY_MISSING = "--insecure-fast needs NumPy, an optional dependency that is not installed. Run 'pip install numpy'."
+
+class SeededRandom:
+    # Callable like secrets.token_bytes, so it can be passed anywhere a `randbytes` source is accepted.
+    # Time-based IDs read `millis` instead of the wall clock: one millisecond per batch, so they sort by batch.
+    def __init__(self, seed, stream=0):
+        np = get_numpy()
+        if np is None: raise ValueError(SEEDED_NUMPY_MISSING)
+        self.rng = np.random.Generator(np.random.PCG64([stream, seed]))
+        self.millis = SEEDED_EPOCH_MS + stream
+
+    def __call__(self, n):
+        return self.rng.bytes(n)
+
+def batch_randbytes(spec, index):
+    # Random source for batch number `index` of a run.
+    if spec['seed'] is None: return secrets.token_bytes
+    return SeededRandom(spec['seed'], index)
+
+def _rejection_params(size):
+    # Draw `width` bytes per sample and reject values >= limit so that `value % size` stays unbiased.
+    width = 1 if size <= 0x100 else 2 if size <= 0x10000 else 4
+    span = 1 << (8 * width)
+    return width, span - span % size
+
+@lru_cache(maxsize=64)
+def _translation_table(char_set):
+    # Maps every accepted byte straight to its alphabet character; rejected bytes are deleted by bytes.translate.
+    size = len(char_set)
+    limit = 256 - 256 % size
+    table = bytes(ord(char_set[b % size]) if b < limit else 0 for b in range(256))
+    return table, bytes(range(limit, 256))
+
+def random_indices(count, size, randbytes=secrets.token_bytes):
+    if size <= 0: raise ValueError("Character set is empty.")
+    if size == 1: return [0] * count
+    rng = getattr(randbytes, 'rng', None)
+    if rng is not None: return rng.integers(0, size, count).tolist()
+    width, limit = _rejection_params(size)
+    span = 1 << (8 * width)
+    np = get_numpy()
+    result = []
+    while len(result) < count:
+        needed = count - len(result)
+        # Over-request in proportion to the rejection rate so one CSPRNG read almost always suffices.
+        n = needed * span // limit + 64
+        raw = randbytes(n * width)
+        if np is not None:
+            values = np.frombuffer(raw, dtype=f'<u{width}')
+            # `limit` and `size` can equal the span (256, 65536), which does not fit the dtype;
+            # nothing is rejected or reduced then.
+            if limit < span: values = values[values < limit]
+            if size < span: values = values % size
+            result.extend(values.tolist())
+        else:
+            values = array({1: 'B', 2: 'H', 4: 'I'}[width], raw) if width > 1 else raw
+            result.extend(v % size for v in values if v < limit)
+    del result[count:]
+    return result
+
+def random_string(count, char_set, randbytes=secrets.token_bytes):
+    # Returns `count` characters drawn uniformly (with replacement) from char_set, same as secrets.choice.
+    size = len(char_set)
+    if size == 0: raise ValueError("Character set is empty.")
+    if count <= 0: return ''
+    if size <= 0x100 and max(map(ord, char_set)) < 0x100:
+        rng = getattr(randbytes, 'rng', None)
+        if rng is not None:
+            np = get_numpy()
+            return np.frombuffer(char_set.encode('latin-1'), dtype=np.uint8)[rng.integers(0, size, count)].tobytes().decode('latin-1')
+        table, rejected = _translation_table(char_set)
+        chunks, have = [], 0
+        while have < count:
+            chunk = randbytes((count - have) * 256 // (256 - len(rejected)) + 64).translate(table, rejected)
+            chunks.append(chunk)
+            have += len(chunk)
+        return b''.join(chunks)[:count].decode('latin-1')
+    return ''.join(map(char_set.__getitem__, random_indices(count, size, randbytes)))
+
+def random_strings(count, length, char_set, randbytes=secrets.token_bytes):
+    if length <= 0:
+        if not char_set: raise ValueError("Character set is empty.")
+        return [''] * count
+    data = random_string(count * length, char_set, randbytes)
+    return [data[i:i + length] for i in range(0, count * length, length)]
 
 # --- Helper Functions ---
 def load_config():
@@ -64,11 +264,12 @@ def load_config():
     return config
 
 def save_config(config):
-    with open(CONFIG_FILE_PATH, 'w') as configfile:
+    with profile_stage('save_config'), open(CONFIG_FILE_PATH, 'w') as configfile:
         config.write(configfile)
 
-def print_colored(text, color_key):
-    print(f"{color_map.get(color_key, Color.WHITE)}{text}{Color.RESET}")
+def print_colored(text, color_key, file=None):
+    with profile_stage('print'):
+        print(f"{color_map.get(color_key, Color.WHITE)}{text}{Color.RESET}", file=file)
 
 def typing_animation(text, delay=0.03):
     for char in text:
@@ -92,6 +293,28 @@ def apply_case(text, case_style):
     if case_style == 'random':
         return "".join(secrets.choice([c.upper, c.lower])() for c in text)
     return text
+
+def apply_case_batch(texts, case_style, randbytes=secrets.token_bytes):
+    if not case_style: return texts
+    if case_style != 'random':
+        return [apply_case(text, case_style) for text in texts]
+    rng = getattr(randbytes, 'rng', None)
+    joined = ''.join(texts)
+    if rng is not None and joined.isascii():
+        # Seeded runs pick every character from the upper- or lowercased batch in one vectorized step.
+        np = get_numpy()
+        upper, lower = (np.frombuffer(text.encode('ascii'), dtype=np.uint8) for text in (joined.upper(), joined.lower()))
+        joined = np.where(rng.integers(0, 2, len(joined), dtype=np.uint8).astype(bool), upper, lower).tobytes().decode('ascii')
+        ends = list(accumulate(map(len, texts)))
+        return [joined[start:end] for start, end in zip([0] + ends[:-1], ends)]
+    # One coin flip per character, drawn for the whole batch at once.
+    mask = random_string(sum(map(len, texts)), 'ul', randbytes)
+    result, pos = [], 0
+    for text in texts:
+        flips = mask[pos:pos + len(text)]
+        pos += len(text)
+        result.append("".join(c.upper() if m == 'u' else c.lower() for c, m in zip(text, flips)))
+    return result
     
 def get_entropy_strength(entropy):
     if entropy >= 128: return "Very Strong"
@@ -100,7 +323,7 @@ def get_entropy_strength(entropy):
     return "Weak"
 
 # --- Generation Functions ---
-def generate_password(length, use_letters, use_numbers, use_special, custom_chars):
+def build_char_set(use_letters, use_numbers, use_special, custom_chars):
     char_set = ''
     if custom_chars:
         char_set = custom_chars
@@ -109,13 +332,181 @@ def generate_password(length, use_letters, use_numbers, use_special, custom_char
         if use_numbers: char_set += string.digits
         if use_special: char_set += string.punctuation
     if not char_set: raise ValueError("Character set is empty.")
+    return char_set
+
+def generate_password(length, use_letters, use_numbers, use_special, custom_chars):
+    char_set = build_char_set(use_letters, use_numbers, use_special, custom_chars)
     return ''.join(secrets.choice(char_set) for _ in range(length)), char_set
 
-def load_words(lang_code):
-    lang_file = os.path.join(DICTIONARIES_DIR, f"{lang_code.upper()}.txt")
-    if not os.path.exists(lang_file):
-        raise FileNotFoundError(f"Dictionary for language '{lang_code}' not found. Try --update-dictionaries.")
-    
+def generate_password_batch(count, length, use_letters, use_numbers, use_special, custom_chars, randbytes=secrets.token_bytes):
+    char_set = build_char_set(use_letters, use_numbers, use_special, custom_chars)
+    return random_strings(count, length, char_set, randbytes), char_set
+
+def generate_pin_batch(count, length, randbytes=secrets.token_bytes):
+    if length <= 0: raise ValueError("PIN length must be a positive integer.")
+    return random_strings(count, length, string.digits, randbytes)
+
+def generate_hex_batch(count, length, randbytes=secrets.token_bytes):
+    if length <= 0: raise ValueError("Hex key length must be a positive integer.")
+    # Same output as secrets.token_hex(ceil(length / 2))[:length], but from one CSPRNG read per batch.
+    step = 2 * math.ceil(length / 2)
+    data = randbytes(count * step // 2).hex()
+    return [data[i:i + length] for i in range(0, count * step, step)]
+
+# --- ID Engine ---
+# UUIDs, ULIDs and NanoIDs are built a whole batch at a time: one CSPRNG read fills every ID, version and
+# variant bits are set with bytes.translate over strided slices, and the text form is assembled by copying
+# columns between fixed-size records. No per-key object is ever created.
+NANOID_ALPHABET = 'useandom-26T198340PX75pxJACKVERYMINDBUSHWOLF_GQZbfghjklqvwyzrict' # NanoID's URL-safe alphabet
+NANOID_DEFAULT_SIZE = 21
+CROCKFORD_ALPHABET = b'0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_CROCKFORD_LOW_BITS = bytes(CROCKFORD_ALPHABET[b & 31] for b in range(256)) # one base32 digit from a byte's low 5 bits
+_UUID_VERSION_TABLES = {version: bytes((b & 0x0F) | (version << 4) for b in range(256)) for version in (4, 7)}
+_UUID_VARIANT_TABLE = bytes((b & 0x3F) | 0x80 for b in range(256))
+_UUID_FIELDS = ((0, 0, 8), (9, 8, 4), (14, 12, 4), (19, 16, 4), (24, 20, 12)) # (output offset, hex offset, width)
+
+def _format_records(data, record_size, fields, template):
+    # Rearranges `data`, a run of fixed-size ASCII records, into strings shaped like `template`. Each field
+    # column is moved with one strided slice copy; whatever the fields don't cover keeps the template's text.
+    count = len(data) // record_size
+    stride = len(template) + 1
+    out = bytearray((template + b'\n') * count)
+    for dst, src, width in fields:
+        for j in range(width): out[dst + j::stride] = data[src + j::record_size]
+    return out.decode('ascii').split('\n')[:-1]
+
+def _uuid_strings(raw, version):
+    raw[6::16] = raw[6::16].translate(_UUID_VERSION_TABLES[version])
+    raw[8::16] = raw[8::16].translate(_UUID_VARIANT_TABLE)
+    return _format_records(raw.hex().encode('ascii'), 32, _UUID_FIELDS, b'-' * 36)
+
+def _put_timestamp(buffer, offset, stride, count, millis):
+    for j, byte in enumerate(millis.to_bytes(6, 'big')): buffer[offset + j::stride] = bytes((byte,)) * count
+
+def current_millis(randbytes):
+    millis = getattr(randbytes, 'millis', None) # Seeded runs use a fixed clock
+    return time.time_ns() // 1_000_000 if millis is None else millis
+
+def generate_uuid4_batch(count, randbytes=secrets.token_bytes):
+    return _uuid_strings(bytearray(randbytes(16 * count)), 4)
+
+def generate_uuid7_batch(count, randbytes=secrets.token_bytes):
+    # RFC 9562 UUIDv7: 48-bit Unix milliseconds, then 74 random bits around the version and variant fields.
+    raw = bytearray(randbytes(16 * count))
+    _put_timestamp(raw, 0, 16, count, current_millis(randbytes))
+    return _uuid_strings(raw, 7)
+
+def _repeat_mask(mask, count):
+    return int.from_bytes(mask.to_bytes(16, 'big') * count, 'big')
+
+def _spread_base32(values):
+    # Lays each 80-bit value out as 16 bytes holding one 5-bit digit apiece, most significant first. All values
+    # are packed into one big integer (128 bits per value) and split in halves four times with mask-and-shift
+    # passes, so the work is a handful of linear big-integer operations rather than a loop over digits.
+    count = len(values)
+    packed = int.from_bytes(b''.join(value.to_bytes(16, 'big') for value in values), 'big')
+    for shift, width, period in ((24, 40, 128), (12, 20, 64), (6, 10, 32), (3, 5, 16)):
+        low = sum(((1 << width) - 1) << offset for offset in range(0, 128, period))
+        packed = (packed & _repeat_mask(low, count)) | ((packed & _repeat_mask(low << width, count)) << shift)
+    return packed.to_bytes(16 * count, 'big')
+
+def _ulid_strings(millis, digits):
+    # A ULID is 10 base32 digits of timestamp (shared by the whole batch) followed by 16 digits of randomness;
+    # `digits` holds one random 5-bit value per byte, 16 bytes per ULID.
+    timestamp = bytes(CROCKFORD_ALPHABET[(millis >> shift) & 31] for shift in range(45, -5, -5))
+    return _format_records(digits.translate(_CROCKFORD_LOW_BITS), 16, ((10, 0, 16),), timestamp + b'0' * 16)
+
+class MonotonicUlidClock:
+    # Hands out strictly increasing ULIDs across batches and threads. Within one millisecond, each ULID's
+    # random part is the previous one plus a random step of 1..2**32, so later IDs are still hard to guess.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_millis, self.last_random = -1, 0
+
+    def reserve(self, count, randbytes=secrets.token_bytes):
+        steps = array('I', randbytes(4 * count))
+        with self.lock:
+            millis = max(current_millis(randbytes), self.last_millis)
+            start = self.last_random if millis == self.last_millis else int.from_bytes(randbytes(10), 'big') >> 1
+            values = list(accumulate((step + 1 for step in steps), initial=start))[1:]
+            while values[-1] >= 1 << 80: # Random part exhausted for this millisecond: move on to the next one
+                millis += 1
+                values = list(accumulate((step + 1 for step in steps), initial=int.from_bytes(randbytes(10), 'big') >> 1))[1:]
+            self.last_millis, self.last_random = millis, values[-1]
+        return millis, values
+
+monotonic_ulid_clock = MonotonicUlidClock()
+
+def generate_ulid_batch(count, monotonic=False, randbytes=secrets.token_bytes):
+    if monotonic:
+        # A seeded batch owns its millisecond, so it starts a clock of its own and stays reproducible.
+        clock = monotonic_ulid_clock if getattr(randbytes, 'millis', None) is None else MonotonicUlidClock()
+        millis, values = clock.reserve(count, randbytes)
+        return _ulid_strings(millis, _spread_base32(values))
+    # Every digit is 5 uniform bits, so 16 random bytes masked to their low 5 bits are a ULID's randomness.
+    return _ulid_strings(current_millis(randbytes), randbytes(16 * count))
+
+def generate_nano_id_batch(count, size=NANOID_DEFAULT_SIZE, randbytes=secrets.token_bytes):
+    # 64 symbols divide 256 evenly, so every random byte is used with no rejection.
+    return random_strings(count, size, NANOID_ALPHABET, randbytes)
+
+# --- Dictionary Storage ---
+# Compiled dictionaries (<LANG>.kcd) sit next to the text lists so they can be memory-mapped:
+#   magic | int64 source mtime_ns | uint64 source size | uint32 word count
+#   | (count + 1) uint32 offsets into the blob | UTF-8 word blob
+# The source fields identify the text list the file was built from; any other list triggers a rebuild.
+DICTIONARY_MAGIC = b'KCDICT2\n'
+_DICTIONARY_HEADER = struct.Struct('<8sqQI')
+_DICTIONARY_SPAN = struct.Struct('<2I')
+_word_cache = {} # lang_code -> (signature, words)
+_word_cache_lock = threading.Lock() # Server refills and parallel jobs share the cache across threads
+
+class MappedWordList(Sequence):
+    # Read-only word list backed by an mmap of a compiled dictionary; lookups decode a single word.
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(DICTIONARY_MAGIC)] != DICTIONARY_MAGIC or len(self._map) < _DICTIONARY_HEADER.size:
+            self._map.close()
+            raise ValueError(f"'{path}' is not a compiled KeyConstruct dictionary.")
+        _, mtime_ns, size, self._count = _DICTIONARY_HEADER.unpack_from(self._map, 0)
+        self.source = (mtime_ns, size)
+        self._offsets = _DICTIONARY_HEADER.size
+        self._blob = self._offsets + 4 * (self._count + 1)
+        self._words = None
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0: index += self._count
+        if not 0 <= index < self._count: raise IndexError("word index out of range")
+        start, end = _DICTIONARY_SPAN.unpack_from(self._map, self._offsets + 4 * index)
+        return self._map[self._blob + start:self._blob + end].decode('utf-8')
+
+    def tolist(self):
+        # Decodes every word once, for bulk runs that would otherwise decode the same words many times over.
+        if self._words is None:
+            offsets = struct.unpack_from(f'<{self._count + 1}I', self._map, self._offsets)
+            blob = self._map[self._blob:self._blob + offsets[-1]]
+            self._words = [blob[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+        return self._words
+
+    def close(self):
+        self._words = None
+        self._map.close()
+
+def bulk_words(words, picks):
+    # The word list to index `picks` lookups into: a mapped list is decoded whole when that is cheaper.
+    return words.tolist() if isinstance(words, MappedWordList) and picks >= len(words) else words
+
+def dictionary_paths(lang_code):
+    base = os.path.join(DICTIONARIES_DIR, lang_code.upper())
+    return base + '.txt', base + '.kcd'
+
+def parse_word_file(lang_file):
     words = []
     with open(lang_file, 'r', encoding='utf-8') as f:
         for line in f:
@@ -131,6 +522,100 @@ def load_words(lang_code):
                 words.append(line)
     return words
 
+def source_signature(stat):
+    return (stat.st_mtime_ns, stat.st_size)
+
+def compile_dictionary(words, compiled_path, source):
+    encoded = [word.encode('utf-8') for word in words]
+    offsets = array('I', [0])
+    for word in encoded:
+        offsets.append(offsets[-1] + len(word))
+    if sys.byteorder != 'little': offsets.byteswap()
+    # Every --workers process may compile the same list lazily, so each writes its own temp file and the
+    # finished file is swapped in atomically; readers never see a half-written .kcd.
+    fd, tmp_path = require('tempfile').mkstemp(dir=os.path.dirname(compiled_path), prefix=os.path.basename(compiled_path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_DICTIONARY_HEADER.pack(DICTIONARY_MAGIC, *source, len(encoded)))
+            f.write(offsets.tobytes())
+            f.write(b''.join(encoded))
+        os.replace(tmp_path, compiled_path)
+    except BaseException:
+        remove_partial_output(tmp_path)
+        raise
+
+def release_words(lang_code):
+    # Only drops the cache entry: compiled patterns and server pools may still hold the old list, so its
+    # mmap is left for the garbage collector to close once nothing refers to it.
+    _word_cache.pop(lang_code.lower(), None)
+
+def load_words(lang_code):
+    with profile_stage('load_words'), _word_cache_lock:
+        return _load_words(lang_code.lower())
+
+def _file_signature(path):
+    try:
+        return source_signature(os.stat(path))
+    except FileNotFoundError:
+        return None
+
+def _load_words(lang_code):
+    lang_file, compiled_file = dictionary_paths(lang_code)
+    source, compiled = _file_signature(lang_file), _file_signature(compiled_file)
+    if source is None and compiled is None:
+        raise FileNotFoundError(f"Dictionary for language '{lang_code}' not found. Try --update-dictionaries.")
+    cached = _word_cache.get(lang_code)
+    if cached and cached[0] == (source, compiled):
+        return cached[1]
+    release_words(lang_code)
+
+    # The compiled dictionary is only used if it was built from exactly this text list (same mtime and
+    # size), so a list restored with an older timestamp is not shadowed by a stale .kcd.
+    words = None
+    if compiled is not None:
+        try:
+            words = MappedWordList(compiled_file)
+        except ValueError:
+            if source is None: raise
+        if words is not None and source is not None and words.source != source: words = None
+    if words is None:
+        words = parse_word_file(lang_file)
+        try:
+            compile_dictionary(words, compiled_file, source)
+            compiled = _file_signature(compiled_file)
+        except OSError:
+            pass # Read-only install; keep using the text list
+    _word_cache[lang_code] = ((source, compiled), words)
+    return words
+
+def passphrase_entropy(dictionary_size, num_words):
+    # Words are drawn without replacement, so each pick has one fewer candidate.
+    return sum(math.log2(dictionary_size - i) for i in range(min(num_words, dictionary_size)) if dictionary_size - i > 1)
+
+def sample_indices_batch(count, population, k, randbytes=secrets.token_bytes):
+    # Uniform k-permutations of range(population) for a whole batch (partial Fisher-Yates over random columns).
+    rng = getattr(randbytes, 'rng', None)
+    if rng is not None and k * k <= population:
+        # Seeded runs draw whole rows with replacement and redraw the few that repeat an index, which leaves
+        # the accepted rows uniform over k-permutations.
+        np = get_numpy()
+        samples = rng.integers(0, population, (count, k))
+        while True:
+            ordered = np.sort(samples, axis=1)
+            repeated = np.flatnonzero((ordered[:, 1:] == ordered[:, :-1]).any(axis=1))
+            if not repeated.size: return samples.tolist()
+            samples[repeated] = rng.integers(0, population, (repeated.size, k))
+    columns = [random_indices(count, population - j, randbytes) for j in range(k)]
+    samples = []
+    for row in zip(*columns):
+        swaps, picked = {}, []
+        for j, r in enumerate(row):
+            r += j
+            picked.append(swaps.get(r, r))
+            swaps[r] = swaps.get(j, j)
+        samples.append(picked)
+    return samples
+
 def generate_passphrase(num_words, lang_code, separator='-'):
     words = load_words(lang_code)
     if len(words) < num_words:
@@ -138,114 +623,2023 @@ def generate_passphrase(num_words, lang_code, separator='-'):
         num_words = len(words)
     return separator.join(secrets.SystemRandom().sample(words, num_words))
 
-def generate_from_pattern(pattern_string):
-    result, char_set_used = [], ""
-    i = 0
-    while i < len(pattern_string):
-        if pattern_string[i] == '[':
-            match = re.match(r'\[word([A-Za-z]{2})\]', pattern_string[i:])
-            if match:
-                lang_code = match.group(1).lower()
-                word = secrets.choice(load_words(lang_code))
-                result.append(word)
-                i += len(match.group(0))
-                continue
-        char_type = pattern_string[i]
-        char_map = {'A': string.ascii_letters, '9': string.digits, 'S': string.punctuation, 'X': string.ascii_letters + string.digits + string.punctuation}
-        if char_type in char_map:
-            char_set = char_map[char_type]
-            result.append(secrets.choice(char_set))
-            char_set_used += char_set
+def generate_passphrase_batch(count, num_words, lang_code, separator='-', randbytes=secrets.token_bytes):
+    if num_words <= 0: raise ValueError("Number of passphrase words must be a positive integer.")
+    words = load_words(lang_code)
+    num_words = min(num_words, len(words)) # run_generation warns about this once per run
+    samples = sample_indices_batch(count, len(words), num_words, randbytes)
+    words = bulk_words(words, count * num_words)
+    return [separator.join([words[i] for i in picked]) for picked in samples]
+
+# --- Pattern Compiler ---
+PATTERN_CHAR_MAP = {'A': string.ascii_letters, '9': string.digits, 'S': string.punctuation, 'X': string.ascii_letters + string.digits + string.punctuation}
+PATTERN_WORD_TOKEN = re.compile(r'\[word([A-Za-z]{2})\]')
+
+def choice_entropy(seq):
+    # Exact Shannon entropy (bits) of one uniform pick from seq; duplicates make some values more likely.
+    counts = Counter(seq)
+    if len(counts) == len(seq): return math.log2(len(seq)) if seq else 0
+    total = len(seq)
+    return -sum(c / total * math.log2(c / total) for c in counts.values())
+
+class CompiledPattern:
+    # A pattern template parsed once into slots that can render any number of keys:
+    #   ('literal', text, 1)       fixed text copied into every key
+    #   ('chars', alphabet, n)     a run of n characters drawn from alphabet
+    #   ('word', words, 1)         one word drawn from a resolved word list
+    def __init__(self, pattern_string):
+        self.pattern = pattern_string
+        self.slots = []
+        char_set_used = set()
+        i = 0
+        while i < len(pattern_string):
+            if pattern_string[i] == '[':
+                match = PATTERN_WORD_TOKEN.match(pattern_string, i)
+                if match:
+                    self.slots.append(('word', load_words(match.group(1).lower()), 1))
+                    i = match.end()
+                    continue
+            char_type = pattern_string[i]
+            if char_type in PATTERN_CHAR_MAP:
+                char_set = PATTERN_CHAR_MAP[char_type]
+                char_set_used.update(char_set)
+                self._append('chars', char_set)
+            else:
+                self._append('literal', char_type)
+            i += 1
+        self.char_set = "".join(char_set_used)
+        self.slot_entropy = [n * choice_entropy(value) if kind != 'literal' else 0 for kind, value, n in self.slots]
+        self.entropy = sum(self.slot_entropy)
+        # Word-free Latin-1 patterns render every key as a fixed-width row of bytes (seeded runs only).
+        self.fixed_width = all(kind != 'word' and max(map(ord, value), default=0) < 0x100 for kind, value, n in self.slots)
+
+    def _append(self, kind, value):
+        if self.slots and self.slots[-1][0] == kind and (kind == 'literal' or self.slots[-1][1] is value):
+            last_kind, last_value, n = self.slots[-1]
+            self.slots[-1] = (kind, last_value + value, 1) if kind == 'literal' else (kind, last_value, n + 1)
         else:
-            result.append(char_type)
-        i += 1
-    return "".join(result), "".join(set(char_set_used))
+            self.slots.append((kind, value, 1))
+
+    def render(self, count, randbytes=secrets.token_bytes):
+        rng = getattr(randbytes, 'rng', None)
+        if rng is not None and self.fixed_width and self.slots: return self._render_rows(count, rng)
+        columns = []
+        for kind, value, n in self.slots:
+            if kind == 'literal':
+                columns.append(repeat(value, count))
+            elif kind == 'chars':
+                columns.append(random_strings(count, n, value, randbytes) if n > 1 else random_string(count, value, randbytes))
+            else:
+                indices = random_indices(count, len(value), randbytes)
+                words = bulk_words(value, count)
+                columns.append([words[j] for j in indices])
+        if not columns: return [''] * count
+        return ["".join(parts) for parts in zip(*columns)]
+
+    def _render_rows(self, count, rng):
+        # Builds the whole batch as one (count, width) byte matrix, decodes it once and cuts it into keys.
+        np = get_numpy()
+        columns = []
+        for kind, value, n in self.slots:
+            codes = np.frombuffer(value.encode('latin-1'), dtype=np.uint8)
+            columns.append(np.broadcast_to(codes, (count, len(codes))) if kind == 'literal' else codes[rng.integers(0, len(codes), (count, n))])
+        rows = np.hstack(columns)
+        text, width = rows.tobytes().decode('latin-1'), rows.shape[1]
+        return [text[i:i + width] for i in range(0, count * width, width)]
+
+@lru_cache(maxsize=128)
+def compile_pattern(pattern_string):
+    with profile_stage('compile_pattern'):
+        return CompiledPattern(pattern_string)
+
+def generate_from_pattern(pattern_string):
+    compiled = compile_pattern(pattern_string)
+    return compiled.render(1)[0], compiled.char_set
 
 # --- Dictionary and File Functions ---
-def update_dictionaries():
-    # Corrected Czech dictionary URL
-    dictionaries = {
-        'en': 'https://www.eff.org/files/2016/07/18/eff_large_wordlist.txt',
-        'cz': 'https://raw.githubusercontent.com/redhat-developer-demos/quarkus-tutorial-wordlist/main/wordlist-cs.txt',
-        'de': 'https://www.eff.org/files/2016/07/18/eff_large_wordlist.txt', # Using large wordlist for DE, ES, FR for now
-        'es': 'https://www.eff.org/files/2016/07/18/eff_large_wordlist.txt',
-        'fr': 'https://www.eff.org/files/2016/07/18/eff_large_wordlist.txt',
-    }
+DICTIONARY_SOURCES = {
+    'en': 'https://www.eff.org/files/2016/07/18/eff_large_wordlist.txt',
+    'cz': 'https://raw.githubusercontent.com/redhat-developer-demos/quarkus-tutorial-wordlist/main/wordlist-cs.txt',
+    'de': 'https://www.eff.org/files/2016/07/18/eff_large_wordlist.txt', # Using large wordlist for DE, ES, FR for now
+    'es': 'https://www.eff.org/files/2016/07/18/eff_large_wordlist.txt',
+    'fr': 'https://www.eff.org/files/2016/07/18/eff_large_wordlist.txt',
+}
+DICTIONARY_MANIFEST = 'manifest.json' # Validators and checksums of the last successful download, per URL and language
+DOWNLOAD_WORKERS = 4
+DOWNLOAD_TIMEOUT = (10, 60) # (connect, read) seconds
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+DOWNLOAD_PROGRESS_BYTES = 1 << 20 # Lists at least this large report progress while downloading
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = require('json').load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.setdefault('urls', {})
+    manifest.setdefault('languages', {})
+    return manifest
+
+def _save_manifest(manifest, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        require('json').dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _download(session, url, validators, tmp_path, report):
+    # Streams `url` into tmp_path. Returns None when the server answers 304 Not Modified, else the new
+    # manifest entry (validators, sha256 and size).
+    headers = {}
+    if validators.get('etag'): headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'): headers['If-Modified-Since'] = validators['last_modified']
+    with session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT, stream=True) as response:
+        if response.status_code == 304: return None
+        response.raise_for_status()
+        expected = int(response.headers.get('Content-Length') or 0)
+        digest, size, next_report = require('hashlib').sha256(), 0, DOWNLOAD_PROGRESS_BYTES
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+                if size >= next_report:
+                    report(f"  {url}: {size / 1e6:.1f} MB" + (f" of {expected / 1e6:.1f} MB" if expected else ""))
+                    next_report += DOWNLOAD_PROGRESS_BYTES
+        if expected and size != expected and 'Content-Encoding' not in response.headers:
+            raise IOError(f"truncated download ({size} of {expected} bytes)")
+        return {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified'),
+                'sha256': digest.hexdigest(), 'bytes': size}
+
+def _install_dictionary(lang, download_path):
+    # Copies the verified download into place with an atomic rename and recompiles the mapped .kcd next to it.
+    lang_file, compiled_file = dictionary_paths(lang)
+    tmp_path = lang_file + '.tmp'
+    require('shutil').copyfile(download_path, tmp_path)
+    words = parse_word_file(tmp_path)
+    if not words:
+        os.remove(tmp_path)
+        raise ValueError("downloaded list contains no words")
+    with _word_cache_lock:
+        release_words(lang)
+        os.replace(tmp_path, lang_file)
+    try:
+        compile_dictionary(words, compiled_file, source_signature(os.stat(lang_file)))
+    except OSError:
+        pass # e.g. Windows refuses to replace a .kcd that is still mapped; the newer text list is used until then
+    return len(words)
+
+def update_dictionaries(sources=None, workers=DOWNLOAD_WORKERS):
+    # Every distinct URL is fetched once, in parallel over one pooled session. Lists whose validators still
+    # match (ETag / Last-Modified) are skipped with a conditional request. Returns True if nothing failed.
+    requests = require('requests')
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    sources = dict(sources or DICTIONARY_SOURCES)
     os.makedirs(DICTIONARIES_DIR, exist_ok=True)
+    manifest_path = os.path.join(DICTIONARIES_DIR, DICTIONARY_MANIFEST)
+    manifest = _load_manifest(manifest_path)
+    languages_by_url = {}
+    for lang, url in sources.items(): languages_by_url.setdefault(url, []).append(lang.lower())
+
+    print_lock = threading.Lock()
+    def report(text, color='info'):
+        with print_lock: print_colored(text, color)
+
+    def fetch(url, download_path):
+        langs = languages_by_url[url]
+        # Only ask "has it changed?" when every language served by this URL is installed from that same download.
+        installed = all(os.path.exists(dictionary_paths(lang)[0]) and
+                        manifest['languages'].get(lang, {}).get('sha256') == manifest['urls'].get(url, {}).get('sha256') for lang in langs)
+        return _download(session, url, manifest['urls'].get(url, {}) if installed else {}, download_path, report)
+
     print_colored("Updating dictionaries...", 'header')
-    for lang, url in dictionaries.items():
-        try:
-            print_colored(f"Downloading {lang.upper()} dictionary...", 'info')
-            response = requests.get(url)
-            response.raise_for_status()
-            with open(os.path.join(DICTIONARIES_DIR, f"{lang.upper()}.txt"), 'wb') as f:
-                f.write(response.content)
-        except requests.exceptions.RequestException as e:
-            print_colored(f"Error downloading {lang.upper()} dictionary: {e}", 'error')
-    print_colored("Dictionary update complete.", 'header')
+    failures = 0
+    workers = max(1, min(workers, len(languages_by_url)))
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=3)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            downloads = {}
+            for index, url in enumerate(languages_by_url):
+                download_path = os.path.join(DICTIONARIES_DIR, f".download-{os.getpid()}-{index}")
+                downloads[pool.submit(fetch, url, download_path)] = (url, download_path)
+            for future in as_completed(downloads):
+                url, download_path = downloads[future]
+                names = ", ".join(lang.upper() for lang in languages_by_url[url])
+                try:
+                    entry = future.result()
+                    if entry is None:
+                        report(f"{names}: up to date.")
+                        continue
+                    if entry['sha256'] == manifest['urls'].get(url, {}).get('sha256') and all(
+                            manifest['languages'].get(lang, {}).get('sha256') == entry['sha256'] and os.path.exists(dictionary_paths(lang)[0])
+                            for lang in languages_by_url[url]):
+                        report(f"{names}: unchanged (sha256 {entry['sha256'][:12]}).")
+                    else:
+                        for lang in languages_by_url[url]:
+                            count = _install_dictionary(lang, download_path)
+                            manifest['languages'][lang] = {'url': url, 'sha256': entry['sha256'], 'words': count}
+                        report(f"{names}: updated, {count:,} words, {entry['bytes']:,} bytes (sha256 {entry['sha256'][:12]}).")
+                    manifest['urls'][url] = entry
+                    _save_manifest(manifest, manifest_path)
+                except (requests.exceptions.RequestException, OSError, ValueError) as e:
+                    failures += 1
+                    report(f"Error updating {names} dictionary: {e}", 'error')
+                finally:
+                    if os.path.exists(download_path): os.remove(download_path)
+    print_colored("Dictionary update complete." if not failures else f"Dictionary update finished with {failures} failed download(s).", 'header')
+    return not failures
 
-def encrypt_file(filepath, password):
-    salt = os.urandom(16)
-    kdf = PBKDF2HMAC(
+# --- Encryption ---
+# Chunked container (version 2), written straight from the generation stream:
+#   header: magic | version | 16-byte salt | uint32 PBKDF2 iterations | uint32 chunk size | 7-byte nonce prefix
+#   frames: uint32 length | AES-256-GCM ciphertext+tag of up to `chunk size` plaintext bytes
+# Each frame's nonce is the prefix, a big-endian frame counter and a final-frame flag, and the header is
+# authenticated with every frame, so reordered, truncated or extended files fail to decrypt.
+# Files that do not start with the magic are the original salt + Fernet token format.
+ENCRYPTION_MAGIC = b'KCENC'
+ENCRYPTION_VERSION = 2
+ENCRYPTION_CHUNK_SIZE = 1 << 20
+PBKDF2_ITERATIONS = 390000
+_ENCRYPTION_HEADER = struct.Struct('<5sB16sII7s')
+_FRAME_LENGTH = struct.Struct('<I')
+_GCM_TAG_SIZE = 16
+
+def derive_key(password, salt, iterations=PBKDF2_ITERATIONS):
+    hashes = require('cryptography.hazmat.primitives.hashes')
+    kdf = require('cryptography.hazmat.primitives.kdf.pbkdf2').PBKDF2HMAC(
         algorithm=hashes.SHA256(),
-        length=32, # Fernet requires 32-byte key
+        length=32, # Fernet and AES-256-GCM both take a 32-byte key
         salt=salt,
-        iterations=390000,
-        backend=default_backend()
+        iterations=iterations
     )
-    key = Fernet(base64.urlsafe_b64encode(kdf.derive(password.encode())))
-    with open(filepath, 'rb') as f:
-        data = f.read()
-    encrypted_data = key.encrypt(data)
-    with open(filepath + ".enc", 'wb') as f:
-        f.write(salt + encrypted_data)
+    with profile_stage('pbkdf2'):
+        return kdf.derive(password.encode())
+
+def _frame_nonce(prefix, index, final):
+    return prefix + index.to_bytes(4, 'big') + (b'\x01' if final else b'\x00')
+
+class EncryptingSink(io.RawIOBase):
+    # Binary sink that encrypts everything written to it into the chunked container on `raw`.
+    # Pass a `salt` and the `key` derived from it to share one PBKDF2 run across several files (e.g. shards);
+    # every file still gets its own random nonce prefix.
+    def __init__(self, raw, password, chunk_size=ENCRYPTION_CHUNK_SIZE, iterations=PBKDF2_ITERATIONS, salt=None, key=None):
+        super().__init__()
+        salt, self._prefix = salt or os.urandom(16), os.urandom(7)
+        self._header = _ENCRYPTION_HEADER.pack(ENCRYPTION_MAGIC, ENCRYPTION_VERSION, salt, iterations, chunk_size, self._prefix)
+        self._aead = require('cryptography.hazmat.primitives.ciphers.aead').AESGCM(key or derive_key(password, salt, iterations))
+        self._raw, self._chunk_size = raw, chunk_size
+        self._buffer, self._index = bytearray(), 0
+        raw.write(self._header)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        # Hold back the last chunk: it can only be sealed as final once close() knows nothing follows.
+        while len(self._buffer) > self._chunk_size:
+            self._seal(bytes(self._buffer[:self._chunk_size]), False)
+            del self._buffer[:self._chunk_size]
+        return len(data)
+
+    def _seal(self, chunk, final):
+        if self._index >= 0xFFFFFFFF: raise ValueError("Encrypted output exceeds the maximum number of chunks.")
+        with profile_stage('encrypt', nbytes=len(chunk)):
+            frame = self._aead.encrypt(_frame_nonce(self._prefix, self._index, final), chunk, self._header)
+        self._raw.write(_FRAME_LENGTH.pack(len(frame)) + frame)
+        self._index += 1
+
+    def close(self):
+        if not self.closed:
+            self._seal(bytes(self._buffer), True)
+            self._buffer.clear()
+            self._raw.close()
+        super().close()
+
+    def abort(self):
+        # Closes without sealing a final frame, so a partial file can never decrypt as a complete one.
+        if not self.closed:
+            self._buffer.clear()
+            abort_sink(self._raw)
+        super().close()
+
+def abort_sink(sink):
+    # Releases a sink after a failed run without finishing its output; plain files are just closed.
+    getattr(sink, 'abort', sink.close)()
+
+def _read_frame(f, chunk_size):
+    length_bytes = f.read(_FRAME_LENGTH.size)
+    if not length_bytes: return None
+    if len(length_bytes) != _FRAME_LENGTH.size: raise ValueError("encrypted file is truncated")
+    (length,) = _FRAME_LENGTH.unpack(length_bytes)
+    if length > chunk_size + _GCM_TAG_SIZE: raise ValueError("encrypted frame is larger than the declared chunk size")
+    frame = f.read(length)
+    if len(frame) != length: raise ValueError("encrypted file is truncated")
+    return frame
+
+def iter_decrypted_chunks(filepath_enc, password):
+    # Yields authenticated plaintext chunks; nothing is yielded from a frame that fails verification.
+    try:
+        with open(filepath_enc, 'rb') as f:
+            header = f.read(_ENCRYPTION_HEADER.size)
+            if not header.startswith(ENCRYPTION_MAGIC):
+                salt = header[:16] # Read the 16-byte salt
+                import base64
+                fernet = require('cryptography.fernet').Fernet(base64.urlsafe_b64encode(derive_key(password, salt)))
+                yield fernet.decrypt(header[16:] + f.read())
+                return
+            if len(header) != _ENCRYPTION_HEADER.size: raise ValueError("encrypted file is truncated")
+            _, version, salt, iterations, chunk_size, prefix = _ENCRYPTION_HEADER.unpack(header)
+            if version != ENCRYPTION_VERSION: raise ValueError(f"unsupported encrypted file version {version}")
+            aead = require('cryptography.hazmat.primitives.ciphers.aead').AESGCM(derive_key(password, salt, iterations))
+            frame, index = _read_frame(f, chunk_size), 0
+            if frame is None: raise ValueError("encrypted file is truncated")
+            while True:
+                # A frame is final only if nothing follows it; the flag is part of the nonce, so cutting the
+                # file at a frame boundary makes the new last frame fail authentication.
+                next_frame = _read_frame(f, chunk_size)
+                yield aead.decrypt(_frame_nonce(prefix, index, next_frame is None), frame, header)
+                if next_frame is None: return
+                frame, index = next_frame, index + 1
+    except Exception as e:
+        raise ValueError(f"Decryption failed: {str(e) or type(e).__name__}. Check password and file integrity.")
+
+def encrypt_file(filepath, password):
+    with open(filepath, 'rb') as src:
+        sink = EncryptingSink(open(filepath + ".enc", 'wb'), password)
+        try:
+            while True:
+                block = src.read(ENCRYPTION_CHUNK_SIZE)
+                if not block: break
+                sink.write(block)
+        except BaseException:
+            abort_sink(sink)
+            remove_partial_output(filepath + ".enc")
+            raise
+        sink.close()
     print_colored(f"Encrypted file saved to {filepath}.enc", 'info')
 
 def decrypt_file(filepath_enc, password):
+    return b"".join(iter_decrypted_chunks(filepath_enc, password)).decode('utf-8')
+
+# --- Generation Pipeline ---
+def resolve_mode(args):
+    if args.wifi:
+        args.pattern = 'AANS-AANS-AANS-AANS' # WPA2-Personal typically 8-63 chars, complex. Sets pattern.
+        args.length = 16 # Explicitly set length for presets
+    if args.bank:
+        args.pattern = 'ANANANANAN' # Example bank pattern: letters, numbers. Simplified.
+        args.length = 10 # Explicitly set length for presets
+    if args.memorable: args.pattern = '[wordEN]-[wordEN]-99S'
+
+    mode = 'default'
+    if args.words: mode = 'words'
+    elif args.pattern: mode = 'pattern'
+    elif args.uuid: mode = 'uuid'
+    elif args.uuid7: mode = 'uuid7'
+    elif args.ulid: mode = 'ulid'
+    elif args.nano_id: mode = 'nano_id'
+    elif args.hex is not None: mode = 'hex'
+    elif args.pin is not None: mode = 'pin'
+    return mode
+
+def build_spec(args, mode):
+    # Everything a batch needs to know about the requested keys, as a plain (picklable) dict.
+    spec = {'mode': mode, 'length': args.length, 'case': args.case, 'letters': args.letters, 'numbers': args.numbers,
+            'special': args.special, 'custom': args.custom, 'pattern': args.pattern, 'words': args.words, 'lang': args.lang,
+            'hex': args.hex, 'pin': args.pin, 'monotonic': args.monotonic, 'seed': args.seed}
+    if args.monotonic and mode != 'ulid': raise ValueError("--monotonic only applies to --ulid.")
+    if (args.seed is None) != (not args.insecure_fast):
+        raise ValueError("--seed and --insecure-fast go together: seeded keys are predictable and only fit for test fixtures.")
+    if args.seed is not None:
+        if args.seed < 0: raise ValueError("--seed must be a non-negative integer.")
+        if get_numpy() is None: raise ValueError(SEEDED_NUMPY_MISSING)
+        if args.encrypt: raise ValueError("--insecure-fast keys are predictable from the seed; refusing to encrypt them as if they were secret.")
+        if args.unordered: raise ValueError("--unordered makes the order of seeded output vary between runs; drop it.")
+    # Only apply default char types if no other explicit generation options are set.
+    if mode == 'default' and not (args.letters or args.numbers or args.special or args.custom):
+        spec['letters'] = spec['numbers'] = spec['special'] = True
+    return spec
+
+def nano_id_size(spec):
+    return spec['length'] if spec['length'] != 12 else NANOID_DEFAULT_SIZE # -l overrides NanoID's default size of 21
+
+def generate_batch(spec, count, randbytes=secrets.token_bytes):
+    with profile_stage('generate', items=count):
+        return _generate_batch(spec, count, randbytes)
+
+def _generate_batch(spec, count, randbytes):
+    mode = spec['mode']
+    fixed_entropy, bits_per_char = None, 0
+    if mode == 'hex':
+        keys = generate_hex_batch(count, spec['hex'], randbytes)
+        bits_per_char = calculate_entropy('x', string.hexdigits)
+    elif mode == 'pin':
+        keys = generate_pin_batch(count, spec['pin'], randbytes)
+        bits_per_char = calculate_entropy('x', string.digits)
+    elif mode == 'pattern':
+        compiled = compile_pattern(spec['pattern'])
+        keys, fixed_entropy = compiled.render(count, randbytes), compiled.entropy
+    elif mode == 'words':
+        keys = generate_passphrase_batch(count, spec['words'], spec['lang'], randbytes=randbytes)
+        fixed_entropy = passphrase_entropy(len(load_words(spec['lang'])), spec['words'])
+    elif mode == 'uuid':
+        keys = generate_uuid4_batch(count, randbytes)
+        fixed_entropy = 122 # UUIDv4 has 122 random bits
+    elif mode == 'uuid7':
+        keys = generate_uuid7_batch(count, randbytes)
+        fixed_entropy = 122 # UUIDv7: 48-bit timestamp + 74 random bits, counted like ULID
+    elif mode == 'ulid':
+        keys = generate_ulid_batch(count, spec['monotonic'], randbytes)
+        fixed_entropy = 128 # ULID has 128 bits of entropy (time + randomness)
+    elif mode == 'nano_id':
+        size = nano_id_size(spec)
+        keys = generate_nano_id_batch(count, size, randbytes)
+        fixed_entropy = size * math.log2(64) # NanoID uses a 64-character alphabet by default.
+    else: # mode == 'default' (includes --custom)
+        keys, char_set = generate_password_batch(count, spec['length'], spec['letters'], spec['numbers'], spec['special'], spec['custom'], randbytes)
+        bits_per_char = calculate_entropy('x', char_set)
+
+    # Entropy only depends on the key length, so it is computed once per distinct length in the batch.
+    if spec['case']:
+        with profile_stage('apply_case', items=count):
+            keys = apply_case_batch(keys, spec['case'], randbytes)
+    items, meta = [], {}
+    for key in keys:
+        size = len(key)
+        if size not in meta:
+            entropy = fixed_entropy if fixed_entropy is not None else size * bits_per_char
+            meta[size] = (round(entropy, 2), get_entropy_strength(entropy))
+        entropy_bits, strength = meta[size]
+        items.append({"key": key, "entropy_bits": entropy_bits, "strength": strength})
+    return items
+
+def iter_batches(spec, total, batch_size=GENERATION_BATCH_SIZE, first_batch=0):
+    # `first_batch` numbers the batches for seeded runs; the CSPRNG path ignores it.
+    remaining, index = total, first_batch
+    while remaining > 0:
+        count = min(remaining, batch_size)
+        yield generate_batch(spec, count, batch_randbytes(spec, index))
+        remaining -= count
+        index += 1
+
+def _parallel_batch(spec, count, preformat, index=0):
+    # Runs in a worker process. Each process reads the OS CSPRNG on its own, so no random state is shared;
+    # seeded runs derive each batch's stream from its number, so the worker count never changes the output.
+    items = generate_batch(spec, count, batch_randbytes(spec, index))
+    if preformat: return count, None, OUTPUT_FORMATS[preformat](None, spec['mode']).format_batch(items)
+    return count, items, None
+
+def iter_parallel_batches(spec, total, workers, ordered=True, preformat=None, batch_size=GENERATION_BATCH_SIZE, first_batch=0):
+    # Yields (count, items, text) tuples. With `preformat`, workers also render their batch in that output
+    # format and only the text crosses the process boundary, so the parent is left with plain writes.
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    sizes = (min(batch_size, total - offset) for offset in range(0, total, batch_size))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for index, size in enumerate(sizes, first_batch):
+            pending.append(pool.submit(_parallel_batch, spec, size, preformat, index))
+            # Keep a bounded number of batches in flight so memory stays flat.
+            while len(pending) >= workers * 2:
+                yield from _drain_batches(pending, ordered, wait, FIRST_COMPLETED)
+        while pending:
+            yield from _drain_batches(pending, ordered, wait, FIRST_COMPLETED)
+
+def _drain_batches(pending, ordered, wait, first_completed):
+    # Generation happens in the workers, so the parent profiles the time it spends waiting for their batches.
+    if ordered:
+        with profile_stage('generate') as stage:
+            result = pending.popleft().result()
+            stage.items = result[0]
+        yield result
+        return
+    with profile_stage('generate') as stage:
+        done, _ = wait(pending, return_when=first_completed)
+        results = [future.result() for future in done]
+        stage.items = sum(result[0] for result in results)
+    for future in done: pending.remove(future)
+    yield from results
+
+# --- Duplicate Filtering ---
+# --unique keeps an exact set while the run fits in `memory_keys`. Beyond that it switches to a Bloom
+# filter over everything emitted so far: keys the filter has never seen are new for certain and are
+# written at once. The exact set is spilled to disk in runs of `memory_keys` whenever it fills. Bloom hits
+# ("suspects") are held back and settled in batches against the spilled runs, one run in memory at a
+# time, while the shortfall is topped up with fresh draws.
+UNIQUE_MEMORY_KEYS = 1_000_000
+UNIQUE_BLOOM_ERROR_RATE = 0.01
+UNIQUE_TOPUP_MIN = 1000
+UNIQUE_WARN_FRACTION = 0.05 # Warn once a run asks for more than this share of the keyspace
+UNIQUE_STALL_DRAWS = 1_000_000
+
+class BloomFilter:
+    # Double hashing over Python's str hash, which is stable for the life of the process (all a run needs).
+    def __init__(self, capacity, error_rate=UNIQUE_BLOOM_ERROR_RATE):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        step = (h >> 32) | 1
+        return [(h + i * step) % self.size for i in range(self.hashes)]
+
+    def check_and_add(self, keys):
+        # Returns the indexes of keys that may have been added before and adds all the others.
+        # `keys` must not repeat within a call.
+        np = get_numpy()
+        if np is None:
+            bits, hits = self.bits, []
+            for i, key in enumerate(keys):
+                positions = self._positions(key)
+                if all(bits[p >> 3] & (1 << (p & 7)) for p in positions): hits.append(i)
+                else:
+                    for p in positions: bits[p >> 3] |= 1 << (p & 7)
+            return hits
+        if not keys: return []
+        h = np.array([hash(key) for key in keys], dtype=np.int64).view(np.uint64)
+        step = (h >> np.uint64(32)) | np.uint64(1)
+        positions = (h[:, None] + np.arange(self.hashes, dtype=np.uint64)[None, :] * step[:, None]) % np.uint64(self.size)
+        table = np.frombuffer(self.bits, dtype=np.uint8)
+        masks = (np.uint64(1) << (positions & np.uint64(7))).astype(np.uint8)
+        hit = ((table[positions >> np.uint64(3)] & masks) != 0).all(axis=1)
+        new = np.sort(positions[~hit], axis=None) # Bits of the same byte end up adjacent and are OR-ed together
+        if new.size:
+            index = new >> np.uint64(3)
+            starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+            table[index[starts]] |= np.bitwise_or.reduceat((np.uint64(1) << (new & np.uint64(7))).astype(np.uint8), starts)
+        return np.flatnonzero(hit).tolist()
+
+class UniqueFilter:
+    def __init__(self, total, memory_keys=UNIQUE_MEMORY_KEYS):
+        self.memory_keys = max(1, memory_keys)
+        self.seen = set() # Every emitted key in memory mode; only the keys not yet spilled in Bloom mode
+        self.bloom = BloomFilter(total) if total > self.memory_keys else None
+        self.suspects = {} # Bloom hits awaiting an exact check, in draw order
+        self.runs, self.spill_dir = [], None
+        self.stats = {'candidates': 0, 'duplicates': 0, 'false_positives': 0, 'spilled_runs': 0}
+
+    def admit(self, items, limit):
+        # Returns up to `limit` items that are new for certain and records them as emitted. Surplus new keys are
+        # dropped unrecorded (at worst they leave a few extra bits in the Bloom filter).
+        keys = [item["key"] for item in items]
+        seen, suspects, stats = self.seen, self.suspects, self.stats
+        stats['candidates'] += len(keys)
+        if len(set(keys)) < len(keys):
+            batch = {}
+            for item in items: batch.setdefault(item["key"], item)
+            stats['duplicates'] += len(items) - len(batch)
+            keys, items = list(batch), list(batch.values())
+        if self.bloom is None:
+            hits = [] if seen.isdisjoint(keys) else [i for i, key in enumerate(keys) if key in seen]
+            stats['duplicates'] += len(hits)
+        else:
+            # Bloom misses cannot repeat anything emitted or suspected so far, so only hits need a look.
+            hits = self.bloom.check_and_add(keys)
+            for i in hits:
+                key = keys[i]
+                if key in seen or key in suspects: stats['duplicates'] += 1
+                else: suspects[key] = items[i]
+        if hits:
+            skip = set(hits)
+            items = [item for i, item in enumerate(items) if i not in skip]
+        elif len(items) <= limit:
+            seen.update(keys)
+            limit = None
+        if limit is not None:
+            items = items[:limit]
+            seen.update(item["key"] for item in items)
+        if self.bloom is not None and len(seen) >= self.memory_keys: self._spill()
+        return items
+
+    def _spill(self):
+        if self.spill_dir is None: self.spill_dir = require('tempfile').mkdtemp(prefix='keygen-unique-')
+        path = os.path.join(self.spill_dir, f"run{len(self.runs):05d}")
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write("\n".join(self.seen) + "\n")
+        self.runs.append(path)
+        self.stats['spilled_runs'] += 1
+        self.seen = set()
+
+    def _read_run(self, path):
+        with open(path, encoding='utf-8', newline='\n') as f:
+            return f.read().split("\n")[:-1]
+
+    def resolve(self, limit):
+        # Settles every pending suspect in one pass over the spilled runs, then returns up to `limit`
+        # of the ones that turned out to be Bloom false positives, in their original draw order.
+        if not self.suspects: return []
+        suspects, self.suspects = self.suspects, {}
+        fresh = set(suspects).difference(self.seen)
+        for path in self.runs:
+            if not fresh: break
+            fresh.difference_update(fresh.intersection(self._read_run(path)))
+        self.stats['duplicates'] += len(suspects) - len(fresh)
+        self.stats['false_positives'] += len(fresh)
+        recovered = [item for key, item in suspects.items() if key in fresh][:max(0, limit)]
+        self.seen.update(item["key"] for item in recovered) # Already set in the Bloom filter
+        return recovered
+
+    def close(self):
+        self.resolve(0) # Leftover suspects only matter for the duplicate count
+        if self.spill_dir: require('shutil').rmtree(self.spill_dir, ignore_errors=True)
+        self.runs, self.spill_dir = [], None
+
+def case_variants(text):
+    # How many distinct strings --case random can turn `text` into.
+    return math.prod(len({c.upper(), c.lower()}) for c in text)
+
+def spec_keyspace(spec):
+    # Number of distinct keys a spec can produce, with --case counted per position: upper and lower fold the
+    # alphabet, alternating folds even positions up and odd ones down, random doubles every cased character.
+    mode, case = spec['mode'], spec['case']
+    def run_keyspace(chars, start, n):
+        # Distinct strings for n characters drawn from `chars`, starting at key position `start`.
+        if case == 'random': return len({v for c in chars for v in (c.upper(), c.lower())}) ** n
+        if case == 'alternating':
+            evens = (start + n + 1) // 2 - (start + 1) // 2
+            return len(set(chars.upper())) ** evens * len(set(chars.lower())) ** (n - evens)
+        return len(set(apply_case(chars, case) if case in ('upper', 'lower') else chars)) ** n
+    if mode == 'hex': return run_keyspace('0123456789abcdef', 0, spec['hex'])
+    if mode == 'pin': return 10 ** spec['pin']
+    if mode == 'words':
+        # Words are stored lowercase, so only random case adds keys: k! times the k-th elementary symmetric
+        # sum of the words' variant counts (every ordered pick of distinct words, times its case variants).
+        words = load_words(spec['lang'])
+        k = min(spec['words'], len(words))
+        if case != 'random': return math.perm(len(words), k)
+        sums = [1] + [0] * k
+        for variants in map(case_variants, bulk_words(words, len(words))):
+            for j in range(k, 0, -1): sums[j] += sums[j - 1] * variants
+        return math.factorial(k) * sums[k]
+    if mode in ('uuid', 'uuid7'): return 2 ** 122 # Random case only adds keys to these; they are never near exhaustion
+    if mode == 'ulid': return 2 ** 128
+    if mode == 'nano_id': return run_keyspace(NANOID_ALPHABET, 0, nano_id_size(spec))
+    if mode == 'pattern':
+        keyspace, position = 1, 0
+        for kind, value, n in compile_pattern(spec['pattern']).slots:
+            if kind == 'word':
+                keyspace *= sum(map(case_variants, bulk_words(value, len(value)))) if case == 'random' else len(value)
+                position = None # Words vary in length, so later positions have no fixed parity
+                continue
+            chars, n = (value, n) if kind == 'chars' else (None, len(value))
+            if position is None:
+                # Only a run whose count does not depend on parity can follow a word.
+                counts = {run_keyspace(chars, start, n) if chars else math.prod(run_keyspace(c, start + i, 1) for i, c in enumerate(value))
+                          for start in (0, 1)}
+                if len(counts) > 1: raise ValueError("--unique cannot count the keys of --case alternating after a [word] slot; use another --case.")
+                keyspace *= counts.pop()
+            else:
+                keyspace *= run_keyspace(chars, position, n) if chars else math.prod(run_keyspace(c, position + i, 1) for i, c in enumerate(value))
+                position += n
+        return keyspace
+    return run_keyspace(build_char_set(spec['letters'], spec['numbers'], spec['special'], spec['custom']), 0, spec['length'])
+
+def unique_keyspace(spec, total):
+    # The keyspace and the expected number of draws per kept key (coupon-collector estimate).
+    keyspace = spec_keyspace(spec)
+    if total > keyspace:
+        raise ValueError(f"--unique: requested {total:,} keys but this mode only has {keyspace:,} distinct keys.")
+    if total == keyspace: return keyspace, math.log(keyspace) + 0.5772 + 1 / (2 * keyspace) # Harmonic number H(n)
+    fraction = total / keyspace
+    return keyspace, -math.log1p(-fraction) / fraction if fraction > 0 else 1.0
+
+def iter_unique_batches(spec, total, unique, workers=1, ordered=True, keyspace=math.inf, first_batch=0):
+    remaining, stalled = total, 0
     try:
-        with open(filepath_enc, 'rb') as f:
-            salt = f.read(16) # Read the 16-byte salt
-            encrypted_data = f.read()
-
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32, # Fernet requires 32-byte key
-            salt=salt,
-            iterations=390000,
-            backend=default_backend()
-        )
-        key = Fernet(base64.urlsafe_b64encode(kdf.derive(password.encode())))
-        decrypted_data = key.decrypt(encrypted_data)
-        return decrypted_data.decode('utf-8')
+        while remaining > 0:
+            before = remaining
+            draws = remaining if not unique.stats['candidates'] else max(remaining, UNIQUE_TOPUP_MIN)
+            with closing(produce_batches(spec, draws, workers, ordered, first_batch=first_batch)) as batches:
+                for _, items, _ in batches:
+                    fresh = unique.admit(items, remaining)
+                    if len(unique.suspects) >= unique.memory_keys: fresh += unique.resolve(remaining - len(fresh))
+                    if fresh:
+                        remaining -= len(fresh)
+                        yield len(fresh), fresh, None
+                    if not remaining: break
+            if remaining == before:
+                # Fresh draws alone made no progress: the missing keys may be sitting among the suspects.
+                fresh = unique.resolve(remaining)
+                if fresh:
+                    remaining -= len(fresh)
+                    yield len(fresh), fresh, None
+            first_batch += -(-draws // GENERATION_BATCH_SIZE) # Top-up rounds continue the seeded stream
+            stalled = 0 if remaining < before else stalled + draws
+            if stalled > max(UNIQUE_STALL_DRAWS, 20 * keyspace):
+                raise ValueError(f"--unique: only {total - remaining:,} distinct keys found; the keyspace appears exhausted.")
+    finally:
+        unique.close()
+
+def print_unique_report(stats, file=None):
+    rate = stats['duplicates'] / stats['candidates'] if stats['candidates'] else 0.0
+    line = f"Unique: {stats['candidates']:,} drawn, {stats['duplicates']:,} duplicates discarded ({rate:.4%} collision rate)"
+    if stats['spilled_runs']:
+        line += f", {stats['spilled_runs']} spill runs, {stats['false_positives']:,} Bloom false positives"
+    print_colored(line + ".", 'info', file)
+
+# --- Output Writers ---
+# Writers receive batches of items and emit them incrementally, so memory stays flat regardless of --keys.
+# format_batch() is side-effect free so worker processes can render batches ahead of the writer.
+class OutputWriter:
+    def __init__(self, stream, mode):
+        self.stream, self.mode = stream, mode
+        self.count, self.bytes_written = 0, 0
+
+    def _emit(self, text):
+        if not text: return
+        data = text.encode('utf-8')
+        with profile_stage('write', nbytes=len(data)):
+            self.stream.write(data)
+        self.bytes_written += len(data)
+
+    def open(self):
+        pass
+
+    def format_batch(self, items):
+        return ""
+
+    def write_formatted(self, text, count):
+        self._emit(text)
+        self.count += count
+
+    def write_batch(self, items):
+        with profile_stage('format', items=len(items)):
+            text = self.format_batch(items)
+        self.write_formatted(text, len(items))
+
+    def close(self):
+        self.stream.flush()
+
+class PlainWriter(OutputWriter):
+    def format_batch(self, items):
+        return "".join(item["key"] + "\n" for item in items)
+
+class CsvWriter(OutputWriter):
+    def open(self):
+        header = "passphrase" if self.mode == 'words' else "key" # Specific header for passphrases
+        self._emit(self._format_rows([[header, "entropy_bits", "strength"]]))
+
+    def _format_rows(self, rows):
+        import csv
+        s_io = io.StringIO()
+        csv.writer(s_io).writerows(rows)
+        return s_io.getvalue()
+
+    def format_batch(self, items):
+        return self._format_rows([item['key'], item['entropy_bits'], item['strength']] for item in items)
+
+class JsonArrayWriter(OutputWriter):
+    # Streams the same text json.dumps(items, indent=2) would produce for the whole list.
+    item_prefix, item_tail = ',\n  {\n    "key": ', ',\n    "entropy_bits": {bits},\n    "strength": {strength}\n  }}'
+
+    def __init__(self, stream, mode):
+        super().__init__(stream, mode)
+        self._tails = {}
+        import json
+        self._dumps, self._encode_key = json.dumps, json.encoder.encode_basestring_ascii
+
+    def _format(self, item):
+        # Items only differ in the key, so the entropy/strength tail is rendered once per distinct pair.
+        meta = (item["entropy_bits"], item["strength"])
+        tail = self._tails.get(meta)
+        if tail is None:
+            tail = self._tails[meta] = self.item_tail.format(bits=self._dumps(meta[0]), strength=self._dumps(meta[1]))
+        return self.item_prefix + self._encode_key(item["key"]) + tail
+
+    def format_batch(self, items):
+        return "".join(map(self._format, items))
+
+    def write_formatted(self, text, count):
+        # Every formatted item starts with a ",\n" separator; the very first one opens the array instead.
+        if text and not self.count: text = "[" + text[1:]
+        super().write_formatted(text, count)
+
+    def close(self):
+        self._emit("\n]\n" if self.count else "[]\n")
+        super().close()
+
+class NdjsonWriter(JsonArrayWriter):
+    item_prefix, item_tail = '{"key": ', ', "entropy_bits": {bits}, "strength": {strength}}}\n'
+
+    def write_formatted(self, text, count):
+        OutputWriter.write_formatted(self, text, count)
+
+    def close(self):
+        OutputWriter.close(self)
+
+class ConsoleWriter(OutputWriter):
+    # Numbered, colored listing for interactive use; one buffered write per batch.
+    def __init__(self, stream, mode, animate=False):
+        super().__init__(stream, mode)
+        self.animate = animate
+
+    def open(self):
+        if self.animate: typing_animation("--- Generated Items ---", 0.01)
+
+    def write_batch(self, items):
+        lines = []
+        for i, item in enumerate(items, self.count + 1):
+            output_str = f"  {i:02d}: {item['key']}"
+            if item['entropy_bits'] > 0: output_str += f" (Entropy: {item['entropy_bits']} bits - {item['strength']})"
+            if self.animate: typing_animation(output_str)
+            else: lines.append(f"{color_map.get('key_output', Color.WHITE)}{output_str}{Color.RESET}\n")
+        self.count += len(items)
+        if lines:
+            text = "".join(lines)
+            with profile_stage('write', nbytes=len(text)):
+                self.stream.write(text)
+            self.bytes_written += len(text)
+
+    def close(self):
+        if self.animate: typing_animation("-----------------------", 0.01)
+        super().close()
+
+OUTPUT_FORMATS = {'plain': PlainWriter, 'csv': CsvWriter, 'json': JsonArrayWriter, 'ndjson': NdjsonWriter}
+
+# --- Compressed and Sharded Output ---
+# --compress cuts the output stream into fixed-size blocks and compresses each one as a complete gzip, bz2
+# or xz stream on a thread pool (zlib, bz2 and lzma release the GIL), writing the results in order.
+# Concatenated streams are valid files for gunzip, bunzip2, unxz and Python's gzip/bz2/lzma readers.
+# --shard-size splits the output into numbered, self-contained files (each with its own CSV header or
+# JSON array) and writes a manifest with the key count, size and SHA-256 of every shard.
+COMPRESSION_FORMATS = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+COMPRESSION_BLOCK_SIZE = 4 << 20
+GZIP_LEVEL = 6 # zlib's default trade-off; level 9 is several times slower for a few percent
+
+def compress_block(method, data):
+    with profile_stage('compress', nbytes=len(data)):
+        if method == 'gzip': return require('gzip').compress(data, compresslevel=GZIP_LEVEL)
+        if method == 'bz2': return require('bz2').compress(data)
+        return require('lzma').compress(data)
+
+def compression_threads():
+    return os.cpu_count() or 1
+
+class CompressingSink(io.RawIOBase):
+    # Binary sink that compresses everything written to it onto `raw`, block by block on `executor`.
+    def __init__(self, raw, method, executor, max_pending, block_size=COMPRESSION_BLOCK_SIZE):
+        super().__init__()
+        self._raw, self._method, self._executor = raw, method, executor
+        self._max_pending, self._block_size = max_pending, block_size
+        self._buffer, self._pending, self._blocks = bytearray(), deque(), 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            self._submit(bytes(self._buffer[:self._block_size]))
+            del self._buffer[:self._block_size]
+        return len(data)
+
+    def _submit(self, block):
+        self._pending.append(self._executor.submit(compress_block, self._method, block))
+        self._blocks += 1
+        # Bounded in-flight blocks keep memory flat when compression is slower than generation.
+        while len(self._pending) > self._max_pending:
+            self._raw.write(self._pending.popleft().result())
+
+    def close(self):
+        if not self.closed:
+            try:
+                if self._buffer or not self._blocks: self._submit(bytes(self._buffer)) # Empty output is still one valid stream
+                while self._pending: self._raw.write(self._pending.popleft().result())
+            finally:
+                self._buffer.clear()
+                self._raw.close()
+        super().close()
+
+    def abort(self):
+        if not self.closed:
+            for future in self._pending: future.cancel()
+            self._pending.clear()
+            self._buffer.clear()
+            abort_sink(self._raw)
+        super().close()
+
+class ChecksumSink(io.RawIOBase):
+    # Counts and hashes the bytes that reach the file, for the shard manifest.
+    def __init__(self, raw):
+        super().__init__()
+        self._raw, self.size, self.sha256 = raw, 0, require('hashlib').sha256()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._raw.write(data)
+        self.sha256.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed: self._raw.close()
+        super().close()
+
+    def abort(self):
+        if not self.closed: abort_sink(self._raw)
+        super().close()
+
+def open_output_sink(path, compress=None, executor=None, encryption=None):
+    # Returns (sink, checksum): the sink the writer writes to (compress, then encrypt) and the ChecksumSink
+    # over the file. `encryption` is a (password, salt, key) tuple.
+    checksum = sink = ChecksumSink(open(path, 'wb'))
+    if encryption: sink = EncryptingSink(sink, encryption[0], salt=encryption[1], key=encryption[2])
+    if compress: sink = CompressingSink(sink, compress, executor, max_pending=2 * compression_threads())
+    return sink, checksum
+
+class ShardedWriter:
+    # Writer front-end that starts a new file, with its own OutputWriter, every shard_size keys.
+    def __init__(self, path, fmt, mode, shard_size, suffix, open_sink):
+        root, ext = os.path.splitext(path)
+        self.shard_template = root + '-{:05d}' + ext + suffix
+        self.manifest_path = root + '.manifest.json'
+        self.fmt, self.mode, self.shard_size, self.suffix, self._open_sink = fmt, mode, shard_size, suffix, open_sink
+        self.shards, self.count, self.bytes_written = [], 0, 0
+        self._writer = self._sink = self._checksum = None
+
+    def open(self):
+        pass
+
+    def _start_shard(self):
+        self._path = self.shard_template.format(len(self.shards) + 1)
+        self._sink, self._checksum = self._open_sink(self._path)
+        self._writer = OUTPUT_FORMATS[self.fmt](self._sink, self.mode)
+        self._writer.open()
+
+    def _finish_shard(self):
+        writer, self._writer = self._writer, None
+        writer.close()
+        self._sink.close()
+        self.bytes_written += writer.bytes_written
+        self.shards.append({'file': os.path.basename(self._path), 'keys': writer.count, 'bytes': writer.bytes_written,
+                            'size': self._checksum.size, 'sha256': self._checksum.sha256.hexdigest()})
+
+    def write_batch(self, items):
+        while items:
+            if self._writer is None: self._start_shard()
+            room = self.shard_size - self._writer.count
+            self._writer.write_batch(items[:room])
+            self.count += min(room, len(items))
+            items = items[room:]
+            if self._writer.count >= self.shard_size: self._finish_shard()
+
+    def close(self):
+        if self._writer is None and not self.shards: self._start_shard() # An empty run still leaves one valid shard
+        if self._writer is not None: self._finish_shard()
+        import json
+        manifest = {'format': self.fmt, 'compression': next((name for name, ext in COMPRESSION_FORMATS.items() if ext in self.suffix), None),
+                    'encrypted': self.suffix.endswith('.enc'), 'shard_size': self.shard_size, 'keys': self.count,
+                    'bytes': self.bytes_written, 'shards': self.shards}
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f: f.write(json.dumps(manifest, indent=2) + "\n")
+        os.replace(tmp_path, self.manifest_path)
+
+    def abort(self):
+        # Discards an incomplete run: the shard being written is released without being finished, and it and
+        # every finished shard are removed. No manifest is written.
+        files = [shard['file'] for shard in self.shards]
+        if self._sink is not None:
+            if not self._sink.closed: abort_sink(self._sink)
+            if os.path.basename(self._path) not in files: files.append(os.path.basename(self._path))
+        for name in files: remove_partial_output(os.path.join(os.path.dirname(self.shard_template), name))
+        self.shards, self._writer = [], None
+
+def remove_partial_output(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def output_format(args):
+    if args.json: return 'json'
+    if args.ndjson: return 'ndjson'
+    if args.csv: return 'csv'
+    if args.plain or args.output: return 'plain' # plain output or default for file output
+    return None
+
+def resolve_workers(workers):
+    if workers is None or workers == 1: return 1
+    if workers <= 0: return os.cpu_count() or 1
+    return workers
+
+def produce_batches(spec, total, workers=1, ordered=True, preformat=None, first_batch=0):
+    workers = resolve_workers(workers)
+    if spec.get('monotonic') and workers > 1 and spec.get('seed') is None:
+        raise ValueError("--monotonic needs a single generator process; drop --workers.")
+    if workers == 1 or total <= GENERATION_BATCH_SIZE:
+        return ((len(items), items, None) for items in iter_batches(spec, total, first_batch=first_batch))
+    return iter_parallel_batches(spec, total, workers, ordered, preformat, first_batch=first_batch)
+
+def check_output_options(args):
+    if (args.compress or args.shard_size is not None) and not args.output:
+        raise ValueError("--compress and --shard-size need --output.")
+    if args.shard_size is not None and args.shard_size <= 0:
+        raise ValueError("--shard-size must be a positive number of keys.")
+
+def run_generation(args, key_cache=None):
+    # key_cache maps passwords to (salt, key) pairs already derived, so batch jobs run PBKDF2 once per password.
+    mode = resolve_mode(args)
+    spec = build_spec(args, mode)
+    fmt = output_format(args)
+    should_animate = args.animate and fmt is None
+
+    if should_animate and args.keys > 5:
+        print_colored("Warning: Animation with many keys might take a long time.", 'info')
+        time.sleep(1) # Give user time to read warning
+
+    # Status lines go to stderr while stdout carries the formatted keys.
+    status_file = sys.stderr if fmt is not None and not args.output else None
+    if spec['seed'] is not None:
+        print_colored(f"Warning: --insecure-fast output is predictable from seed {spec['seed']}; use it for test fixtures only, never real credentials.", 'info', sys.stderr)
+    if mode == 'words' and len(load_words(spec['lang'])) < spec['words']:
+        print_colored(f"Warning: Not enough words in '{spec['lang']}' dictionary. Using all available.", 'info', sys.stderr)
+    unique = None
+    if args.unique:
+        keyspace, draws_per_key = unique_keyspace(spec, args.keys)
+        if args.keys > keyspace * UNIQUE_WARN_FRACTION:
+            print_colored(f"Warning: {args.keys:,} keys is {args.keys / keyspace:.1%} of the {keyspace:,}-key space; "
+                          f"expect about {draws_per_key - 1:.0%} extra draws to replace duplicates.", 'info', status_file)
+        unique = UniqueFilter(args.keys, args.unique_memory)
+
+    check_output_options(args)
+    copied_keys = [] if args.copy else None
+    suffix = (COMPRESSION_FORMATS[args.compress] if args.compress else '') + ('.enc' if args.encrypt else '')
+    encryption = None
+    if args.output and args.encrypt:
+        # Encrypt straight from the generation stream; the plaintext never touches the disk. The key is
+        # derived once, so shards do not each pay for PBKDF2.
+        password = args.encrypt if isinstance(args.encrypt, str) else require('getpass').getpass("Enter encryption password: ")
+        if key_cache is not None and password in key_cache:
+            encryption = (password, *key_cache[password])
+        else:
+            salt = os.urandom(16)
+            encryption = (password, salt, derive_key(password, salt))
+    executor = None
+    if args.compress:
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=compression_threads())
+    open_sink = lambda path: open_output_sink(path, args.compress, executor, encryption)
+    out_file = open_sink(args.output + suffix)[0] if args.output and not args.shard_size else None
+    writer, finished = None, False
+    try:
+        if args.shard_size:
+            writer = ShardedWriter(args.output, fmt, mode, args.shard_size, suffix, open_sink)
+        elif fmt is None:
+            writer = ConsoleWriter(sys.stdout, mode, animate=should_animate)
+        else:
+            sys.stdout.flush()
+            writer = OUTPUT_FORMATS[fmt](out_file or sys.stdout.buffer, mode)
+        writer.open()
+        if unique:
+            batches = iter_unique_batches(spec, args.keys, unique, args.workers, not args.unordered, keyspace)
+        else:
+            # Workers can only pre-render batches when the writer never has to split them (clipboard, shards).
+            preformat = fmt if copied_keys is None and not args.shard_size else None
+            batches = produce_batches(spec, args.keys, args.workers, not args.unordered, preformat)
+        started = time.perf_counter()
+        try:
+            for count, items, text in batches:
+                if text is None:
+                    writer.write_batch(items)
+                    if copied_keys is not None: copied_keys.extend(item["key"] for item in items)
+                else:
+                    writer.write_formatted(text, count)
+            writer.close()
+        finally:
+            count_session(mode, writer.count, writer.bytes_written, time.perf_counter() - started)
+        if out_file: out_file.close()
+        finished = True
+    finally:
+        # A failed or interrupted run leaves no output behind, least of all an encrypted file that would
+        # authenticate as complete.
+        if not finished:
+            if out_file:
+                abort_sink(out_file)
+                remove_partial_output(args.output + suffix)
+            if isinstance(writer, ShardedWriter): writer.abort()
+        if executor: executor.shutdown(cancel_futures=not finished)
+    if unique: print_unique_report(unique.stats, status_file)
+
+    if args.shard_size:
+        print_colored(f"Output saved to {len(writer.shards)} shard(s) listed in {writer.manifest_path}", 'info')
+    elif args.output and args.encrypt:
+        print_colored(f"Encrypted file saved to {args.output}{suffix}", 'info')
+    elif args.output:
+        print_colored(f"Output saved to {args.output}{suffix}", 'info')
+
+    if copied_keys is not None:
+        with profile_stage('copy', items=len(copied_keys)):
+            require('pyperclip').copy("\n".join(copied_keys))
+        print_colored("Generated item(s) copied to clipboard.", 'info')
+    return writer
+
+# --- Library API ---
+# KeyGenerator wraps the generation pipeline for embedding in Python code without the CLI's globals,
+# printing or argument parsing. Options are the command-line option names:
+#   KeyGenerator(wifi=True).generate()
+#   KeyGenerator(words=6, lang='en').generate_many(1000)
+#   async for key in KeyGenerator(uuid=True).aiter_keys(10000): ...
+class KeyGenerator:
+    def __init__(self, **options):
+        args = build_parser().parse_args([])
+        unknown = sorted(set(options) - set(vars(args)))
+        if unknown: raise TypeError(f"Unknown KeyGenerator option(s): {', '.join(unknown)}")
+        for name, value in options.items(): setattr(args, name, value)
+        self._init_from_args(args)
+
+    @classmethod
+    def from_profile(cls, profile):
+        # Same profile syntax as --serve --profiles, e.g. "wifi", "words:6", "pattern:AA-9999".
+        generator = cls.__new__(cls)
+        generator._init_from_args(profile_args(profile))
+        return generator
+
+    def _init_from_args(self, args):
+        self.mode = resolve_mode(args)
+        self.spec = build_spec(args, self.mode)
+        self.workers = resolve_workers(args.workers)
+        self.unique, self.unique_memory = args.unique, args.unique_memory
+        self._next_batch = 0
+        # Resolve dictionaries and compile patterns now, so bad options fail here and later calls only generate.
+        generate_batch(self.spec, 1)
+
+    def _reserve_batches(self, count, batch_size=GENERATION_BATCH_SIZE):
+        # Numbers the batches of the next call, so a seeded generator continues its stream instead of repeating it.
+        first = self._next_batch
+        self._next_batch += -(-count // batch_size)
+        return first
+
+    def _no_unique(self, method):
+        # Uniqueness holds within one call of a known size; these calls have no such bound.
+        if self.unique: raise TypeError(f"KeyGenerator.{method}() cannot guarantee unique keys; use generate_many(), agenerate_many() or iter_items(total).")
+
+    def _unique_batches(self, count, batch_size=GENERATION_BATCH_SIZE):
+        keyspace = unique_keyspace(self.spec, count)[0]
+        return iter_unique_batches(self.spec, count, UniqueFilter(count, self.unique_memory), self.workers,
+                                   keyspace=keyspace, first_batch=self._reserve_batches(count, batch_size))
+
+    def generate(self):
+        self._no_unique('generate')
+        return generate_batch(self.spec, 1, batch_randbytes(self.spec, self._reserve_batches(1, 1)))[0]["key"]
+
+    def generate_many(self, count, details=False):
+        # details=True returns {"key", "entropy_bits", "strength"} dicts instead of plain strings.
+        if self.unique:
+            batches = self._unique_batches(count)
+        else:
+            batches = produce_batches(self.spec, count, self.workers, first_batch=self._reserve_batches(count))
+        result = []
+        for _, items, _ in batches:
+            result.extend(items if details else [item["key"] for item in items])
+        return result
+
+    def iter_items(self, total=None, batch_size=GENERATION_BATCH_SIZE):
+        # Lazy stream of item dicts; endless when total is None. Only one batch is held at a time.
+        if total is not None and self.unique:
+            for _, items, _ in self._unique_batches(total): yield from items
+            return
+        if total is not None:
+            for items in iter_batches(self.spec, total, batch_size, self._reserve_batches(total, batch_size)): yield from items
+            return
+        self._no_unique('iter_items')
+        while True: yield from generate_batch(self.spec, batch_size, batch_randbytes(self.spec, self._reserve_batches(batch_size, batch_size)))
+
+    def __iter__(self):
+        self._no_unique('__iter__')
+        return (item["key"] for item in self.iter_items())
+
+    async def aiter_keys(self, total=None, batch_size=1000, prefetch=2, executor=None, details=False):
+        # Batches are generated in `executor` (the loop's default thread pool unless given; pass a
+        # ProcessPoolExecutor for multi-core throughput). At most `prefetch` batches are ever in flight,
+        # and new ones are only scheduled as the consumer catches up, which gives natural backpressure.
+        self._no_unique('aiter_keys')
+        import asyncio
+        loop = asyncio.get_running_loop()
+        pending, remaining = deque(), total
+
+        def schedule():
+            nonlocal remaining
+            while len(pending) < prefetch and (remaining is None or remaining > 0):
+                size = batch_size if remaining is None else min(batch_size, remaining)
+                if remaining is not None: remaining -= size
+                randbytes = batch_randbytes(self.spec, self._reserve_batches(size, size))
+                pending.append(loop.run_in_executor(executor, generate_batch, self.spec, size, randbytes))
+
+        try:
+            schedule()
+            while pending:
+                items = await pending.popleft()
+                schedule()
+                for item in items:
+                    yield item if details else item["key"]
+        finally:
+            for future in pending: future.cancel()
+
+    async def agenerate_many(self, count, details=False, executor=None):
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(executor, self.generate_many, count, details)
+
+# --- Key Server ---
+# `--serve` keeps dictionaries, compiled patterns and a bounded pool of ready keys per profile in memory.
+# A profile is an option name plus an optional value ("wifi", "words:6", "pattern:AA-9999"), parsed
+# with the regular command-line parser so every generation option is available.
+DEFAULT_SERVER_PROFILES = ('default', 'wifi', 'bank', 'uuid')
+POOL_REFILL_BATCH = 1000 # Keys generated per refill step, kept small so requests are not starved of the GIL
+POOL_RETRY_SECONDS = 1.0 # Pause after a failed refill before the next attempt
+SERVER_MAX_KEYS_PER_REQUEST = 100000
+
+def profile_argv(profile):
+    name, _, value = profile.partition(':')
+    if name == 'default': return ['--length', value] if value else []
+    return ['--' + name.replace('_', '-')] + ([value] if value else [])
+
+def profile_args(profile):
+    try:
+        with redirect_stderr(io.StringIO()): # Keep argparse's usage text out of the server log
+            return build_parser().parse_args(profile_argv(profile))
+    except SystemExit:
+        raise ValueError(f"Invalid profile '{profile}'.")
+
+def profile_spec(profile):
+    args = profile_args(profile)
+    return build_spec(args, resolve_mode(args))
+
+class KeyPool:
+    def __init__(self, name, spec, size):
+        self.name, self.spec, self.size = name, spec, max(1, size)
+        self.low_water = self.size // 2
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.metrics = {'hits': 0, 'misses': 0, 'served': 0, 'refills': 0, 'generated': 0, 'refill_seconds': 0.0, 'refill_errors': 0}
+
+    def take(self, count):
+        with self.cond:
+            ready = min(count, len(self.items))
+            items = [self.items.popleft() for _ in range(ready)]
+            self.metrics['hits'] += ready
+            self.metrics['misses'] += count - ready
+            self.metrics['served'] += count
+            if len(self.items) < self.low_water: self.cond.notify()
+        if ready < count:
+            # Pool ran dry: generate the shortfall on the request thread rather than blocking on the refiller.
+            items += generate_batch(self.spec, count - ready)
+            with self.cond: self.metrics['generated'] += count - ready
+        return items
+
+    def refill_forever(self, stop):
+        while not stop.is_set():
+            with self.cond:
+                while len(self.items) >= self.low_water and not stop.is_set():
+                    self.cond.wait(timeout=1.0)
+                needed = self.size - len(self.items)
+            start = time.perf_counter()
+            try:
+                while needed > 0 and not stop.is_set():
+                    items = generate_batch(self.spec, min(needed, POOL_REFILL_BATCH))
+                    with self.cond:
+                        self.items.extend(items)
+                        self.metrics['generated'] += len(items)
+                    needed -= len(items)
+            except Exception as e:
+                # Keep the refiller alive: requests fall back to generating on their own thread meanwhile.
+                with self.cond: self.metrics['refill_errors'] += 1
+                print_colored(f"Error: refilling pool '{self.name}' failed: {e}", 'error', sys.stderr)
+                stop.wait(POOL_RETRY_SECONDS)
+                continue
+            with self.cond:
+                self.metrics['refills'] += 1
+                self.metrics['refill_seconds'] += time.perf_counter() - start
+
+    def snapshot(self):
+        with self.cond:
+            return dict(self.metrics, available=len(self.items), capacity=self.size)
+
+class KeyServer:
+    def __init__(self, profiles, pool_size):
+        self.pools = {}
+        for profile in profiles:
+            pool = KeyPool(profile, profile_spec(profile), pool_size)
+            pool.items.extend(generate_batch(pool.spec, pool.size)) # Also warms dictionaries and pattern caches
+            pool.metrics['generated'] += pool.size
+            self.pools[profile] = pool
+        self.stop, self.lock = threading.Event(), threading.Lock()
+        self.started = time.time()
+        self.threads = [threading.Thread(target=pool.refill_forever, args=(self.stop,), daemon=True, name=f"refill-{name}")
+                        for name, pool in self.pools.items()]
+        for thread in self.threads: thread.start()
+
+    def take(self, profile, count):
+        pool = self.pools.get(profile)
+        if pool is None: raise KeyError(f"Unknown profile '{profile}'. Available: {', '.join(self.pools)}")
+        if not 1 <= count <= SERVER_MAX_KEYS_PER_REQUEST: raise ValueError(f"Count must be between 1 and {SERVER_MAX_KEYS_PER_REQUEST}.")
+        items = pool.take(count)
+        with self.lock: count_session(pool.spec['mode'], len(items)) # Served from the pool, so not timed
+        return items
+
+    def metrics(self):
+        return {'uptime_seconds': round(time.time() - self.started, 3), 'pools': {name: pool.snapshot() for name, pool in self.pools.items()}}
+
+    def close(self):
+        self.stop.set()
+        for pool in self.pools.values():
+            with pool.cond: pool.cond.notify_all()
+
+def _server_http_handler(key_server):
+    import json
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlsplit, parse_qs
+
+    class Handler(BaseHTTPRequestHandler):
+        # GET /keys/<profile>?n=N&format=plain|json|ndjson, GET /metrics, GET /profiles
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True # Headers and body are separate writes; don't let them wait on delayed ACKs
+
+        def _send(self, status, body, content_type='text/plain; charset=utf-8'):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            parts = [part for part in url.path.split('/') if part]
+            try:
+                if parts == ['metrics']:
+                    return self._send(200, json.dumps(key_server.metrics()), 'application/json')
+                if parts == ['profiles']:
+                    return self._send(200, json.dumps(list(key_server.pools)), 'application/json')
+                if len(parts) == 2 and parts[0] == 'keys':
+                    items = key_server.take(parts[1], int(query.get('n', ['1'])[0]))
+                    fmt = query.get('format', ['plain'])[0]
+                    if fmt == 'json': return self._send(200, json.dumps(items), 'application/json')
+                    if fmt == 'ndjson': return self._send(200, "".join(json.dumps(item) + "\n" for item in items), 'application/x-ndjson')
+                    return self._send(200, "".join(item["key"] + "\n" for item in items))
+                self._send(404, "Not found. Use /keys/<profile>?n=N, /metrics or /profiles.\n")
+            except KeyError as e:
+                self._send(404, f"{e.args[0]}\n")
+            except ValueError as e:
+                self._send(400, f"{e}\n")
+
+        def log_message(self, format, *args):
+            pass # Request logging would dominate the per-request cost
+
+    return Handler
+
+def _server_socket_handler(key_server):
+    import json
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        # Line protocol: "<profile> [count]" answers with one key per line and an empty line,
+        # "metrics" with one JSON line. Errors are "ERR <message>" followed by an empty line.
+        def handle(self):
+            for line in self.rfile:
+                request = line.decode('utf-8').split()
+                if not request: continue
+                try:
+                    if request == ['metrics']:
+                        response = json.dumps(key_server.metrics()) + "\n\n"
+                    else:
+                        items = key_server.take(request[0], int(request[1]) if len(request) > 1 else 1)
+                        response = "".join(item["key"] + "\n" for item in items) + "\n"
+                except (KeyError, ValueError) as e:
+                    response = f"ERR {e.args[0] if isinstance(e, KeyError) else e}\n\n"
+                self.wfile.write(response.encode('utf-8'))
+
+    return Handler
+
+def run_server(args):
+    import socketserver
+    if args.seed is not None or args.insecure_fast: raise ValueError("--seed/--insecure-fast are for one-off fixture runs, not --serve.")
+    profiles = [profile.strip() for profile in args.profiles.split(',') if profile.strip()]
+    print_colored(f"Preparing key pools: {', '.join(profiles)} ({args.pool_size} keys each)...", 'info')
+    key_server = KeyServer(profiles, args.pool_size)
+    if args.socket:
+        if not hasattr(socketserver, 'ThreadingUnixStreamServer'): raise ValueError("Unix sockets are not supported on this platform; use --port.")
+        import stat
+        # Only a stale socket from an earlier run is replaced, never some other file at that path.
+        if os.path.lexists(args.socket):
+            if not stat.S_ISSOCK(os.lstat(args.socket).st_mode): raise ValueError(f"'{args.socket}' exists and is not a socket; refusing to replace it.")
+            os.remove(args.socket)
+        server = socketserver.ThreadingUnixStreamServer(args.socket, _server_socket_handler(key_server))
+        where = f"unix:{args.socket}"
+    else:
+        from http.server import ThreadingHTTPServer
+        server = ThreadingHTTPServer((args.host, args.port), _server_http_handler(key_server))
+        where = f"http://{args.host}:{server.server_address[1]}"
+    server.daemon_threads = True
+    print_colored(f"KeyConstruct key server listening on {where} (Ctrl+C to stop).", 'header')
+    import signal
+    def request_stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, request_stop) # Service managers stop daemons with SIGTERM
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        key_server.close()
+        if args.socket and os.path.exists(args.socket): os.remove(args.socket)
+        print_colored("Key server stopped.", 'info')
+
+# --- Benchmark Suite ---
+# Each case is (name, batch size, work) where work(count) produces `count` keys (or handles `count` items).
+# Trials run the case in batches so per-key latency percentiles come from individual batch timings.
+def benchmark_cases(num_keys, executor):
+    # `executor` is the thread pool the compress/* cases compress on.
+    base = {'mode': 'default', 'length': 16, 'case': None, 'letters': True, 'numbers': True, 'special': True, 'custom': None,
+            'pattern': None, 'words': None, 'lang': 'en', 'hex': None, 'pin': None, 'monotonic': False, 'seed': None}
+    spec = lambda **overrides: {**base, **overrides}
+    cases = [('generate/per-key/16', 1, lambda n: [generate_password(16, True, True, True, None) for _ in range(n)])]
+    for length in (8, 16, 32, 64):
+        cases.append((f'generate/default/{length}', GENERATION_BATCH_SIZE, lambda n, s=spec(length=length): generate_batch(s, n)))
+    for batch_size in (100, 1000, GENERATION_BATCH_SIZE):
+        cases.append((f'generate/default/16/batch-{batch_size}', batch_size, lambda n, s=spec(): generate_batch(s, n)))
+    cases += [
+        ('generate/custom-unicode/16', GENERATION_BATCH_SIZE, lambda n, s=spec(custom='αβγδεζηθικλμνξοπρστυφχψω'): generate_batch(s, n)),
+        ('generate/case-random/16', GENERATION_BATCH_SIZE, lambda n, s=spec(case='random'): generate_batch(s, n)),
+        ('generate/pin/6', GENERATION_BATCH_SIZE, lambda n, s=spec(mode='pin', pin=6): generate_batch(s, n)),
+        ('generate/hex/32', GENERATION_BATCH_SIZE, lambda n, s=spec(mode='hex', hex=32): generate_batch(s, n)),
+        ('generate/pattern/wifi', GENERATION_BATCH_SIZE, lambda n, s=spec(mode='pattern', pattern='AANS-AANS-AANS-AANS'): generate_batch(s, n)),
+        ('generate/uuid/stdlib-per-key', 1, lambda n: [str(require('uuid').uuid4()) for _ in range(n)]),
+        ('generate/uuid', GENERATION_BATCH_SIZE, lambda n, s=spec(mode='uuid'): generate_batch(s, n)),
+        ('generate/uuid7', GENERATION_BATCH_SIZE, lambda n, s=spec(mode='uuid7'): generate_batch(s, n)),
+        ('generate/ulid', GENERATION_BATCH_SIZE, lambda n, s=spec(mode='ulid'): generate_batch(s, n)),
+        ('generate/ulid-monotonic', GENERATION_BATCH_SIZE, lambda n, s=spec(mode='ulid', monotonic=True): generate_batch(s, n)),
+        ('generate/nano_id', GENERATION_BATCH_SIZE, lambda n, s=spec(mode='nano_id', length=21): generate_batch(s, n)),
+        # End-to-end --unique runs (generation included): exact set, then Bloom filter with spill runs.
+        ('unique/set/16', GENERATION_BATCH_SIZE, lambda n, s=spec(): list(iter_unique_batches(s, n, UniqueFilter(n, n)))),
+        ('unique/bloom/16', GENERATION_BATCH_SIZE, lambda n, s=spec(): list(iter_unique_batches(s, n, UniqueFilter(n, max(1, n // 4))))),
+    ]
+    if any(os.path.exists(path) for path in dictionary_paths('en')):
+        lang_file, compiled_file = dictionary_paths('en')
+        cases += [
+            ('generate/words/6', GENERATION_BATCH_SIZE, lambda n, s=spec(mode='words', words=6): generate_batch(s, n)),
+            ('generate/pattern/memorable', GENERATION_BATCH_SIZE, lambda n, s=spec(mode='pattern', pattern='[wordEN]-[wordEN]-99S'): generate_batch(s, n)),
+        ]
+        if os.path.exists(lang_file):
+            cases.append(('dictionary/parse-text', 1, lambda n: [parse_word_file(lang_file) for _ in range(n)]))
+        if os.path.exists(compiled_file):
+            cases.append(('dictionary/open-mapped', 1, lambda n: [MappedWordList(compiled_file).close() for _ in range(n)]))
+    if get_numpy() is not None:
+        # --insecure-fast counterparts of the cases above, to compare against the CSPRNG path.
+        seeded = lambda s: lambda n: generate_batch(s, n, SeededRandom(1))
+        cases += [
+            ('seeded/default/16', GENERATION_BATCH_SIZE, seeded(spec())),
+            ('seeded/case-random/16', GENERATION_BATCH_SIZE, seeded(spec(case='random'))),
+            ('seeded/pattern/wifi', GENERATION_BATCH_SIZE, seeded(spec(mode='pattern', pattern='AANS-AANS-AANS-AANS'))),
+            ('seeded/uuid', GENERATION_BATCH_SIZE, seeded(spec(mode='uuid'))),
+        ]
+        if any(os.path.exists(path) for path in dictionary_paths('en')):
+            cases.append(('seeded/words/6', GENERATION_BATCH_SIZE, seeded(spec(mode='words', words=6))))
+
+    sample = generate_batch(spec(), min(num_keys, GENERATION_BATCH_SIZE))
+    def format_work(fmt):
+        def work(n):
+            writer = OUTPUT_FORMATS[fmt](io.BytesIO(), 'default')
+            writer.open()
+            for offset in range(0, n, len(sample)):
+                writer.write_batch(sample[:n - offset])
+            writer.close()
+        return work
+    for fmt in OUTPUT_FORMATS:
+        cases.append((f'format/{fmt}', GENERATION_BATCH_SIZE, format_work(fmt)))
+
+    payload = PlainWriter(None, 'default').format_batch(sample).encode('utf-8')
+    def encrypt_work(n):
+        # Key derivation is timed separately below; here the sink runs with a minimal iteration count.
+        with EncryptingSink(io.BytesIO(), 'benchmark', iterations=1) as sink:
+            for offset in range(0, n, len(sample)):
+                sink.write(payload if n - offset >= len(sample) else payload[:len(payload) * (n - offset) // len(sample)])
+    def compress_work(method):
+        def work(n):
+            with CompressingSink(io.BytesIO(), method, executor, max_pending=2 * compression_threads()) as sink:
+                for offset in range(0, n, len(sample)):
+                    sink.write(payload if n - offset >= len(sample) else payload[:len(payload) * (n - offset) // len(sample)])
+        return work
+    for method in COMPRESSION_FORMATS:
+        cases.append((f'compress/{method}', GENERATION_BATCH_SIZE, compress_work(method)))
+    cases += [
+        ('encrypt/aes-gcm-stream', GENERATION_BATCH_SIZE, encrypt_work),
+        ('encrypt/pbkdf2-derive', 1, lambda n: [derive_key('benchmark', b'\0' * 16) for _ in range(n)]),
+    ]
+    return cases
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+BENCHMARK_P99_MIN_SAMPLES = 100 # Fewer timed batches than this leave p99 unreported rather than just the maximum
+
+def _benchmark_case(work, num_keys, batch_size, repeat):
+    # Latency is the mean per-key time of each timed batch (a single key for per-key cases), so batched
+    # cases give one sample per batch, not one per key.
+    work(min(batch_size, num_keys)) # Warmup: fills caches (dictionaries, compiled patterns, lazy imports)
+    trial_times, latencies = [], []
+    for _ in range(repeat):
+        trial_start = time.perf_counter()
+        for offset in range(0, num_keys, batch_size):
+            count = min(batch_size, num_keys - offset)
+            start = time.perf_counter()
+            work(count)
+            latencies.append((time.perf_counter() - start) / count)
+        trial_times.append(time.perf_counter() - trial_start)
+    # Peak memory comes from a separate, untimed pass because tracemalloc slows allocation down.
+    import tracemalloc
+    tracemalloc.start()
+    for offset in range(0, num_keys, batch_size):
+        work(min(batch_size, num_keys - offset))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    trial_times.sort()
+    latencies.sort()
+    median = trial_times[len(trial_times) // 2]
+    return {
+        'keys': num_keys, 'batch_size': batch_size, 'repeat': repeat,
+        'throughput': num_keys / median if median else 0.0,
+        'median_seconds': median, 'min_seconds': trial_times[0],
+        'batches': len(latencies), 'batch_p50_us': _percentile(latencies, 0.50) * 1e6,
+        'batch_p99_us': _percentile(latencies, 0.99) * 1e6 if len(latencies) >= BENCHMARK_P99_MIN_SAMPLES else None,
+        'peak_memory_kib': peak / 1024,
+    }
+
+def run_benchmark_suite(num_keys, repeat=5, name_filter=None):
+    import platform
+    results = {'keygen_version': KEYGEN_VERSION, 'python': platform.python_version(), 'platform': platform.platform(),
+               'numpy': get_numpy() is not None, 'keys': num_keys, 'repeat': repeat, 'cases': {}}
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=compression_threads()) as executor:
+        for name, batch_size, work in benchmark_cases(num_keys, executor):
+            if name_filter and name_filter not in name: continue
+            # Single-shot cases (per-key loops, dictionary loads, key derivation) are capped so the suite stays quick.
+            count = num_keys if batch_size > 1 else min(num_keys, 200 if name.startswith('generate') else 5)
+            results['cases'][name] = _benchmark_case(work, count, min(batch_size, count), repeat)
+    return results
+
+def print_benchmark_report(results, baseline=None, threshold=10.0, file=None):
+    # Returns the names of cases whose throughput dropped more than `threshold` percent below the baseline.
+    baseline_cases = (baseline or {}).get('cases', {})
+    regressions = []
+    # p50/p99 are over per-batch mean latencies per key; p99 needs BENCHMARK_P99_MIN_SAMPLES batches.
+    print_colored(f"{'case':<36} {'keys/s':>14} {'batches':>8} {'p50 us':>10} {'p99 us':>10} {'peak KiB':>10}" + (f" {'vs base':>9}" if baseline else ""), 'header', file)
+    for name, case in results['cases'].items():
+        p99 = f"{case['batch_p99_us']:>10.2f}" if case['batch_p99_us'] is not None else f"{'-':>10}"
+        line = f"{name:<36} {case['throughput']:>14,.0f} {case['batches']:>8,} {case['batch_p50_us']:>10.2f} {p99} {case['peak_memory_kib']:>10,.0f}"
+        color = 'benchmark'
+        base = baseline_cases.get(name)
+        if base and base.get('throughput'):
+            change = (case['throughput'] - base['throughput']) / base['throughput'] * 100
+            line += f" {change:>+8.1f}%"
+            if change < -threshold:
+                regressions.append(name)
+                color = 'error'
+        print_colored(line, color, file)
+    return regressions
+
+# --- Password Audit ---
+# --audit runs existing passwords through the same entropy and strength rules as generated keys. Input is
+# read in line-aligned byte chunks that worker processes classify independently. Records carry the line
+# number, never the password itself.
+AUDIT_CHUNK_BYTES = 1 << 20
+AUDIT_MIN_WORD_LENGTH = 4
+AUDIT_CLASSES = (('lower', 'l', string.ascii_lowercase), ('upper', 'u', string.ascii_uppercase), ('digit', 'd', string.digits),
+                 ('symbol', 's', string.punctuation), ('space', 'w', ' '))
+AUDIT_CLASS_TABLE = str.maketrans({c: code for _, code, chars in AUDIT_CLASSES for c in chars})
+AUDIT_LEET_TABLE = str.maketrans('@4$5013!7', 'aassoieit') # Common substitutions undone before the dictionary check
+AUDIT_LENGTH_BUCKETS = ((0, '1-7'), (8, '8-11'), (12, '12-15'), (16, '16-19'), (20, '20+'))
+AUDIT_CSV_HEADER = "line,length,classes,entropy_bits,strength,dictionary_word\n"
+_audit_words = None # Dictionary regex of a worker process
+
+def audit_word_set(lang):
+    try:
+        words = load_words(lang)
+    except FileNotFoundError:
+        return frozenset()
+    return frozenset(w for w in (word.lower() for word in words) if len(w) >= AUDIT_MIN_WORD_LENGTH and w.isalpha())
+
+def dictionary_regex(words):
+    # The word list as a trie-shaped alternation, so the regex engine branches on each character instead of
+    # trying every word. Only "contains some word" matters, so a branch stops at the first word that ends there.
+    if not words: return None
+    trie = {}
+    for word in words:
+        node = trie
+        for c in word: node = node.setdefault(c, {})
+        node[''] = True
+    def build(node):
+        if '' in node: return ''
+        branches = [re.escape(c) + build(child) for c, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return re.compile(build(trie))
+
+def _audit_init(lang):
+    global _audit_words
+    _audit_words = dictionary_regex(audit_word_set(lang))
+
+def audit_chunk(data, first_line, fmt, words=None):
+    # Returns (formatted records, aggregate Counter) for one chunk of raw input lines. `words` is a
+    # dictionary_regex(); worker processes use the one built by _audit_init.
+    words = _audit_words if words is None else words
+    text = data.replace(b'\r\n', b'\n').decode('utf-8', errors='replace')
+    lines = text.split('\n')
+    if text.endswith('\n'): lines.pop()
+    class_lines = text.translate(AUDIT_CLASS_TABLE).split('\n')
+
+    # One regex scan over the whole chunk; after a hit the scan resumes at the next line.
+    flagged_lines = set()
+    if words is not None:
+        lowered = text.lower().translate(AUDIT_LEET_TABLE)
+        line_ends = list(accumulate(len(line) + 1 for line in lowered.split('\n')))
+        match = words.search(lowered)
+        while match:
+            index = bisect_right(line_ends, match.start())
+            flagged_lines.add(index)
+            if index >= len(line_ends): break
+            match = words.search(lowered, line_ends[index])
+
+    keys = [(frozenset(codes), len(password)) if password else None for password, codes in zip(lines, class_lines)]
+    flags = [False] * len(lines)
+    for index in flagged_lines:
+        if index < len(flags): flags[index] = True
+    tally = Counter(zip(keys, flags))
+    blank = sum(count for (key, _), count in tally.items() if key is None)
+    meta = {}
+    for key in {key for key, _ in tally if key is not None}:
+        other = key[0].difference('ludsw') # Unclassified characters keep their own code: this is their distinct set
+        present = [(name, chars) for name, code, chars in AUDIT_CLASSES if code in key[0]]
+        # Each class contributes its whole alphabet; unclassified characters only count themselves.
+        entropy = calculate_entropy('x' * key[1], "".join(chars for _, chars in present) + "".join(other))
+        classes = "+".join([name for name, _ in present] + (['other'] if other else []))
+        entropy_bits, strength = round(entropy, 2), get_entropy_strength(entropy)
+        if fmt == 'csv':
+            tails = tuple(f",{key[1]},{classes},{entropy_bits},{strength},{flag}\n" for flag in ('false', 'true'))
+        else:
+            tails = tuple(f', "length": {key[1]}, "classes": "{classes}", "entropy_bits": {entropy_bits}, '
+                          f'"strength": "{strength}", "dictionary_word": {flag}}}\n' for flag in ('false', 'true'))
+        meta[key] = (tails, classes.count('+') + 1, entropy_bits, strength)
+    prefix = '' if fmt == 'csv' else '{"line": '
+    out = [f"{prefix}{first_line + offset}{meta[key][0][flag]}" for offset, (key, flag) in enumerate(zip(keys, flags))
+           if key is not None] if fmt else []
+
+    stats = Counter(blank=blank)
+    for (key, flagged), count in tally.items():
+        if key is None: continue
+        _, class_count, entropy_bits, strength = meta[key]
+        stats['total'] += count
+        stats['entropy_sum'] += entropy_bits * count
+        stats[('strength', strength)] += count
+        stats[('classes', class_count)] += count
+        stats[('length', next(label for low, label in reversed(AUDIT_LENGTH_BUCKETS) if key[1] >= low))] += count
+        if flagged: stats['dictionary'] += count
+    return "".join(out), stats
+
+def iter_audit_chunks(stream, chunk_bytes=AUDIT_CHUNK_BYTES):
+    # Yields (first line number, bytes) blocks that end on a line boundary.
+    pending, line = b'', 1
+    while True:
+        block = stream.read(chunk_bytes)
+        if not block: break
+        block = pending + block
+        cut = block.rfind(b'\n') + 1
+        if not cut:
+            pending = block
+            continue
+        chunk, pending = block[:cut], block[cut:]
+        yield line, chunk
+        line += chunk.count(b'\n')
+    if pending: yield line, pending
+
+def iter_audit_results(stream, fmt, lang, workers=1):
+    chunks = iter_audit_chunks(stream)
+    if workers == 1:
+        words = dictionary_regex(audit_word_set(lang))
+        for first_line, data in chunks: yield audit_chunk(data, first_line, fmt, words)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_audit_init, initargs=(lang,)) as pool:
+        pending = deque()
+        for first_line, data in chunks:
+            pending.append(pool.submit(audit_chunk, data, first_line, fmt))
+            # Bounded in-flight chunks keep memory flat; results are consumed in input order.
+            if len(pending) >= workers * 2: yield pending.popleft().result()
+        while pending: yield pending.popleft().result()
+
+def print_audit_report(stats, file=None):
+    total = stats['total']
+    print_colored("--- Audit Summary ---", 'header', file)
+    print_colored(f"Passwords: {total:,} (blank lines skipped: {stats['blank']:,})", 'info', file)
+    if not total: return
+    print_colored(f"Mean entropy: {stats['entropy_sum'] / total:.2f} bits", 'info', file)
+    print_colored(f"Contain a dictionary word: {stats['dictionary']:,} ({stats['dictionary'] / total:.1%})", 'info', file)
+    histograms = [
+        ("Strength", [(label, stats[('strength', label)]) for label in ("Weak", "Moderate", "Strong", "Very Strong")]),
+        ("Length", [(label, stats[('length', label)]) for _, label in AUDIT_LENGTH_BUCKETS]),
+        ("Character classes", [(f"{n} class{'es' if n > 1 else ''}", stats[('classes', n)]) for n in range(1, len(AUDIT_CLASSES) + 2)]),
+    ]
+    for title, rows in histograms:
+        print_colored(f"{title}:", 'header', file)
+        for label, count in rows:
+            print_colored(f"  {label:<12}{count:>12,} {count / total:>7.1%}  {'#' * round(40 * count / total)}", 'benchmark', file)
+
+def audit_format(args):
+    # output_format() turns a bare --output into plain text, which audit records have no use for.
+    if args.json or args.plain:
+        raise ValueError("--audit streams records as --csv or --ndjson; leave the format out for the summary only.")
+    if args.ndjson: return 'ndjson'
+    if args.csv or args.output: return 'csv' # a bare --output saves CSV records
+    return None
+
+def run_audit(args):
+    fmt = audit_format(args)
+    if args.audit != '-' and not os.path.exists(args.audit): raise FileNotFoundError(f"Audit file '{args.audit}' not found.")
+    if not audit_word_set(args.lang):
+        print_colored(f"Warning: No '{args.lang}' dictionary found; dictionary words will not be flagged.", 'info', sys.stderr)
+    status_file = sys.stderr if fmt and not args.output else None
+    source = sys.stdin.buffer if args.audit == '-' else open(args.audit, 'rb')
+    out = open(args.output, 'wb') if fmt and args.output else (sys.stdout.buffer if fmt else None)
+    stats = Counter()
+    try:
+        if fmt == 'csv': out.write(AUDIT_CSV_HEADER.encode('utf-8'))
+        results = iter_audit_results(source, fmt, args.lang, resolve_workers(args.workers))
+        while True:
+            with profile_stage('audit') as stage:
+                result = next(results, None)
+                if result: stage.items = result[1]['total']
+            if result is None: break
+            text, chunk_stats = result
+            if out and text:
+                data = text.encode('utf-8')
+                with profile_stage('write', nbytes=len(data)): out.write(data)
+            stats.update(chunk_stats)
+        if out: out.flush()
+    finally:
+        if source is not sys.stdin.buffer: source.close()
+        if out and out is not sys.stdout.buffer: out.close()
+    print_audit_report(stats, status_file)
+    if args.output and fmt: print_colored(f"Audit records saved to {args.output}", 'info', status_file)
+    return stats
+
+# --- Batch Jobs ---
+# --jobs runs many generation specs in one process, so startup, config, dictionaries, compiled patterns
+# and PBKDF2 are paid once. The file holds a list of jobs (or {"jobs": [...]}); each job is an object of
+# command-line options, plus a few shorthands:
+#   {"name": "wifi", "mode": "wifi", "count": 500, "output": "wifi.csv", "format": "csv", "encrypt": "pw"}
+#   {"mode": "words:6", "count": 2000, "lang": "en", "case": "upper", "output": "phrases.txt"}
+#   {"mode": "ulid", "count": 10000, "format": "ndjson", "output": "ids.ndjson", "shard_size": 5000}
+JOB_ALIASES = {'count': 'keys'}
+# Options that select another command or need a terminal, and so make no sense inside a job.
+JOB_EXCLUDED_OPTIONS = {'jobs', 'parallel_jobs', 'decrypt', 'show_decrypted', 'output_decrypted', 'audit', 'serve', 'host', 'port',
+                        'socket', 'profiles', 'pool_size', 'theme', 'stats', 'update_dictionaries', 'dictionary_url', 'benchmark',
+                        'benchmark_repeat', 'benchmark_filter', 'benchmark_json', 'benchmark_baseline', 'benchmark_threshold',
+                        'profile', 'profile_json', 'animate', 'copy'}
+
+def load_jobs(path):
+    import json
+    with open(path, 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+    if isinstance(jobs, dict): jobs = jobs.get('jobs')
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError(f"'{path}' must hold a list of job objects (or {{\"jobs\": [...]}}).")
+    return jobs
+
+def job_option_argv(action, value):
+    # The command-line token for one job option, so argparse applies its own type and choices checks.
+    flag = max(action.option_strings, key=len)
+    if action.nargs == 0: # On/off flags
+        if value == action.default: return []
+        if value == action.const: return [flag]
+        raise ValueError(f"{flag} takes true or false, not {value!r}.")
+    if value is True and action.nargs == '?': return [flag] # --encrypt without a password prompts for one
+    if isinstance(value, (bool, list, dict)) or value is None: raise ValueError(f"{flag} needs a single value, not {value!r}.")
+    return [f"{flag}={value}"] # The '=' form keeps values such as '-_!' from being read as options
+
+def job_args(job, number):
+    # Turns one job object into the command line it stands for and parses that, so every value goes through
+    # the same checks as on the real command line.
+    options = {JOB_ALIASES.get(key, key).replace('-', '_'): value for key, value in job.items()}
+    name = str(options.pop('name', f"job {number}"))
+    mode, fmt = options.pop('mode', None), options.pop('format', None)
+    parser = build_parser()
+    actions = {action.dest: action for action in parser._actions if action.option_strings}
+    argv = []
+    if mode is not None:
+        mode = str(mode)
+        flag = mode.partition(':')[0].replace('-', '_')
+        if ':' not in mode and flag in options: mode = f"{mode}:{options.pop(flag)}" # {"mode": "words", "words": 6}
+        try:
+            profile_args(mode)
+        except ValueError:
+            raise ValueError(f"{name}: invalid mode '{mode}'.")
+        argv += profile_argv(mode)
+    unknown = sorted(key for key in options if key not in actions or key in JOB_EXCLUDED_OPTIONS)
+    if unknown: raise ValueError(f"{name}: unsupported option(s) {', '.join(unknown)}.")
+    if fmt is not None:
+        if fmt not in OUTPUT_FORMATS: raise ValueError(f"{name}: format must be one of {', '.join(OUTPUT_FORMATS)}.")
+        argv.append('--' + fmt)
+    errors = io.StringIO()
+    try:
+        for key, value in options.items(): argv += job_option_argv(actions[key], value)
+        with redirect_stderr(errors):
+            args = parser.parse_args(argv)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}")
+    except SystemExit:
+        raise ValueError(f"{name}: {errors.getvalue().strip().splitlines()[-1].partition('error: ')[2]}")
+    try:
+        # Reject bad options and missing dictionaries before any job starts; this also warms the shared caches.
+        spec = build_spec(args, resolve_mode(args))
+        check_output_options(args)
+        if args.unique: unique_keyspace(spec, args.keys)
+        generate_batch(spec, 1)
+    except (ValueError, OSError) as e:
+        raise ValueError(f"{name}: {e}")
+    return name, args
+
+def run_job(name, args, key_cache):
+    # A failed job is reported in the summary; the other jobs still run.
+    started, error, writer = time.perf_counter(), None, None
+    try:
+        writer = run_generation(args, key_cache)
     except Exception as e:
-        raise ValueError(f"Decryption failed: {e}. Check password and file integrity.")
+        error = str(e)
+    return {'name': name, 'mode': resolve_mode(args), 'keys': writer.count if writer else 0,
+            'bytes': writer.bytes_written if writer else 0, 'seconds': time.perf_counter() - started,
+            'output': args.output, 'error': error}
+
+def run_jobs(args):
+    jobs = [job_args(job, number) for number, job in enumerate(load_jobs(args.jobs), 1)]
+    outputs = [job.output for _, job in jobs if job.output]
+    duplicates = sorted({path for path in outputs if outputs.count(path) > 1})
+    if duplicates: raise ValueError(f"More than one job writes to {', '.join(duplicates)}.")
+    if args.parallel_jobs > 1 and not all(job.output for _, job in jobs):
+        raise ValueError("--parallel-jobs needs an output file for every job, so results do not interleave on stdout.")
+
+    # Passwords are asked for once, up front, and each one goes through PBKDF2 a single time for all its jobs.
+    prompted = None
+    for _, job in jobs:
+        if job.encrypt is True:
+            prompted = prompted or require('getpass').getpass("Enter encryption password for the jobs: ")
+            job.encrypt = prompted
+    key_cache = {}
+    for password in {job.encrypt for _, job in jobs if job.output and job.encrypt}:
+        salt = os.urandom(16)
+        key_cache[password] = (salt, derive_key(password, salt))
+
+    started = time.perf_counter()
+    if args.parallel_jobs > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=args.parallel_jobs) as pool:
+            results = list(pool.map(lambda job: run_job(*job, key_cache), jobs))
+    else:
+        results = [run_job(name, job, key_cache) for name, job in jobs]
+    print_jobs_report(results, time.perf_counter() - started)
+    return all(result['error'] is None for result in results)
+
+def print_jobs_report(results, seconds, file=None):
+    print_colored("--- Job Summary ---", 'header', file)
+    print_colored(f"{'job':<20}{'mode':<10}{'keys':>12}{'seconds':>10}{'keys/s':>14}  output", 'header', file)
+    for result in results:
+        rate = f"{result['keys'] / result['seconds']:,.0f}" if result['keys'] and result['seconds'] > 0 else '-'
+        line = f"{result['name'][:19]:<20}{result['mode']:<10}{result['keys']:>12,}{result['seconds']:>10.3f}{rate:>14}  "
+        if result['error'] is None:
+            print_colored(line + (result['output'] or '(stdout)'), 'benchmark', file)
+        else:
+            print_colored(line + f"FAILED: {result['error']}", 'error', file)
+    failed = sum(result['error'] is not None for result in results)
+    total = sum(result['keys'] for result in results)
+    print_colored(f"{len(results)} job(s), {total:,} keys in {seconds:.3f} s" + (f", {failed} failed." if failed else "."), 'error' if failed else 'info', file)
+
+# --- Statistics Store ---
+# Lifetime statistics live in a SQLite database in WAL mode, holding one row of running totals per
+# mode. Each process adds its session in a single short upsert transaction when it exits. SQLite's
+# locking serialises concurrent runs, so no increment is lost. Generating keys never rewrites the INI.
+STATS_COLUMNS = ('runs', 'keys', 'bytes', 'seconds', 'timed_keys')
+
+def count_session(mode, keys, nbytes=0, seconds=None):
+    # seconds=None marks keys that were not generated on the spot (e.g. served from a pool) and are left out of keys/s.
+    if not keys: return
+    with _session_lock:
+        entry = session_stats.setdefault(mode, Counter())
+        entry['keys'] += keys
+        entry['bytes'] += nbytes
+        if seconds is not None:
+            entry['seconds'] += seconds
+            entry['timed_keys'] += keys
+
+def open_stats_db(path=None):
+    sqlite3 = require('sqlite3')
+    db = sqlite3.connect(path or STATS_DB_PATH, timeout=30, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL") # WAL commits survive a crash of the process; only power loss can drop the last ones
+    db.execute("CREATE TABLE IF NOT EXISTS mode_totals (mode TEXT PRIMARY KEY, runs INTEGER NOT NULL DEFAULT 0, "
+               "keys INTEGER NOT NULL DEFAULT 0, bytes INTEGER NOT NULL DEFAULT 0, seconds REAL NOT NULL DEFAULT 0, "
+               "timed_keys INTEGER NOT NULL DEFAULT 0, last_run REAL)")
+    db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+    return db
+
+def record_stats(session, legacy_count=0, path=None):
+    db = open_stats_db(path)
+    try:
+        db.execute("BEGIN IMMEDIATE")
+        rows = [(mode, 1, *(totals[column] for column in STATS_COLUMNS[1:])) for mode, totals in session.items()]
+        # The INI counter from older versions is imported once, whichever process gets here first.
+        if legacy_count and db.execute("INSERT OR IGNORE INTO meta VALUES (?, ?)", (f"legacy_ini_count:{legacy_count}", time.time())).rowcount:
+            rows.append(('legacy', 0, legacy_count, 0, 0.0, 0))
+        db.executemany("INSERT INTO mode_totals (mode, runs, keys, bytes, seconds, timed_keys, last_run) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                       "ON CONFLICT(mode) DO UPDATE SET runs = runs + excluded.runs, keys = keys + excluded.keys, "
+                       "bytes = bytes + excluded.bytes, seconds = seconds + excluded.seconds, "
+                       "timed_keys = timed_keys + excluded.timed_keys, last_run = excluded.last_run",
+                       [row + (time.time(),) for row in rows])
+        db.execute("COMMIT")
+    except BaseException:
+        if db.in_transaction: db.execute("ROLLBACK")
+        raise
+    finally:
+        db.close()
+
+def read_stats(path=None):
+    db = open_stats_db(path)
+    try:
+        cursor = db.execute(f"SELECT mode, {', '.join(STATS_COLUMNS)} FROM mode_totals ORDER BY keys DESC")
+        return [dict(zip(('mode',) + STATS_COLUMNS, row)) for row in cursor]
+    finally:
+        db.close()
+
+def _stats_total_row(totals):
+    return {'mode': 'total', **{column: sum(row[column] for row in totals) for column in STATS_COLUMNS}}
 
+def migrate_legacy_stats(config):
+    # Moves generation_count from keygen_config.ini into the database: the only INI write stats ever cause.
+    if not config.has_section('statistics'): return
+    record_stats({}, config.getint('statistics', 'generation_count', fallback=0))
+    config.remove_section('statistics')
+    save_config(config)
+
+def flush_session_stats(config):
+    # Runs once on exit. A process that generated nothing leaves both files alone.
+    if not session_stats: return
+    try:
+        with profile_stage('stats'):
+            if config.has_section('statistics'): migrate_legacy_stats(config)
+            record_stats(session_stats)
+    except Exception as e:
+        print_colored(f"Warning: Could not update statistics in {STATS_DB_PATH}: {e}", 'info', sys.stderr)
+    session_stats.clear()
 
 # --- Special Modes ---
 def run_benchmark(args):
-    print_colored("--- Benchmark Mode ---", 'header')
-    num_keys = args.benchmark if args.benchmark > 0 else 1000
-    start_time = time.time()
-    for _ in range(num_keys):
-        generate_password(16, True, True, True, None)
-    end_time = time.time()
-    duration = end_time - start_time
-    kps = num_keys / duration
-    print_colored(f"Generated {num_keys} keys in {duration:.4f} seconds.", 'benchmark')
-    print_colored(f"Speed: {kps:,.2f} keys per second.", 'benchmark')
+    # With --benchmark-json -, stdout carries only the JSON and the table goes to stderr.
+    status_file = sys.stderr if args.benchmark_json == '-' else None
+    print_colored("--- Benchmark Mode ---", 'header', status_file)
+    num_keys = args.benchmark if args.benchmark > 0 else 10000
+    results = run_benchmark_suite(num_keys, repeat=args.benchmark_repeat, name_filter=args.benchmark_filter)
+    baseline = None
+    if args.benchmark_baseline:
+        import json
+        with open(args.benchmark_baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = print_benchmark_report(results, baseline, args.benchmark_threshold, status_file)
+    if args.benchmark_json:
+        import json
+        report = json.dumps(results, indent=2)
+        if args.benchmark_json == '-':
+            print(report)
+        else:
+            with open(args.benchmark_json, 'w', encoding='utf-8') as f: f.write(report + "\n")
+            print_colored(f"Benchmark results saved to {args.benchmark_json}", 'info')
+    if regressions:
+        print_colored(f"{len(regressions)} case(s) regressed by more than {args.benchmark_threshold:g}%: {', '.join(regressions)}", 'error', status_file)
+        return False
+    return True
 
 def show_stats(config):
-    total_gens = config.getint('statistics', 'generation_count', fallback=0)
+    try:
+        migrate_legacy_stats(config)
+        totals = read_stats()
+    except Exception as e:
+        print_colored(f"Error: Could not read statistics from {STATS_DB_PATH}: {e}", 'error')
+        return
     print_colored("--- Generation Statistics ---", 'header')
-    print_colored(f"Keys generated this session: {session_generation_count}", 'info')
-    print_colored(f"Lifetime keys generated: {total_gens + session_generation_count}", 'info')
+    if not totals:
+        print_colored("No keys generated yet.", 'info')
+        return
+    print_colored(f"{'mode':<12}{'runs':>10}{'keys':>16}{'bytes':>18}{'keys/s':>14}", 'header')
+    for row in totals + [_stats_total_row(totals)]:
+        rate = f"{row['timed_keys'] / row['seconds']:,.0f}" if row['seconds'] > 0 else '-'
+        color = 'header' if row['mode'] == 'total' else 'benchmark'
+        print_colored(f"{row['mode']:<12}{row['runs']:>10,}{row['keys']:>16,}{row['bytes']:>18,}{rate:>14}", color)
 
 # --- Main Logic ---
-def main():
-    global color_map, current_theme, session_generation_count
-    config = load_config()
-    color_map = THEMES.get(current_theme, THEMES['default'])
-    
+def build_parser():
     parser = argparse.ArgumentParser(description=f"{color_map['title']}KeyConstruct - A professional key generator.{Color.RESET}", formatter_class=argparse.RawTextHelpFormatter)
     
     # Using plain strings for group titles to avoid SyntaxError with f-strings and escape codes
@@ -253,6 +2647,8 @@ def main():
     gen_group.add_argument('-k', '--keys', type=int, default=1, help='Number of keys.')
     gen_group.add_argument('-l', '--length', type=int, default=12, help='Length of each key.')
     gen_group.add_argument('--custom', type=str, help='Custom character set.')
+    gen_group.add_argument('--unique', action='store_true', help='Guarantee that no key repeats within the run.')
+    gen_group.add_argument('--unique-memory', type=int, metavar='N', default=UNIQUE_MEMORY_KEYS, help=f'With --unique, keep at most N keys in memory before spilling to disk (default: {UNIQUE_MEMORY_KEYS:,}).')
     gen_group.add_argument('--pattern', type=str, help='Pattern to generate from (e.g., "AA-9999-SS").')
     gen_group.add_argument('--case', choices=['upper', 'lower', 'alternating', 'random'], help='Apply case styling.')
 
@@ -265,7 +2661,9 @@ def main():
     preset_group.add_argument('--wifi', action='store_true', help='Strong Wi-Fi password.')
     preset_group.add_argument('--bank', action='store_true', help='Strong banking password.')
     preset_group.add_argument('--uuid', action='store_true', help='Generate a UUID.')
+    preset_group.add_argument('--uuid7', action='store_true', help='Generate a time-ordered UUIDv7.')
     preset_group.add_argument('--ulid', action='store_true', help='Generate a ULID.')
+    preset_group.add_argument('--monotonic', action='store_true', help='With --ulid, make IDs strictly increasing, even within the same millisecond.')
     preset_group.add_argument('--nano-id', action='store_true', help='Generate a Nano ID.')
     preset_group.add_argument('--hex', type=int, metavar='LEN', help='Hexadecimal key of length LEN.')
     preset_group.add_argument('--pin', type=int, metavar='LEN', help='Numeric PIN of length LEN.')
@@ -275,64 +2673,136 @@ def main():
     passphrase_group.add_argument('--words', type=int, metavar='N', help='Passphrase with N words.')
     passphrase_group.add_argument('--lang', type=str, default='en', help='Language for passphrase (default: en).')
     passphrase_group.add_argument('--update-dictionaries', action='store_true', help='Download/update dictionary files.')
+    passphrase_group.add_argument('--dictionary-url', action='append', metavar='LANG=URL', help='With --update-dictionaries, fetch LANG from URL instead (repeatable; only the given languages are updated).')
 
     output_group = parser.add_argument_group('Output Options')
     output_group.add_argument('--json', action='store_true', help='JSON output.')
+    output_group.add_argument('--ndjson', action='store_true', help='Newline-delimited JSON output (one object per line).')
     output_group.add_argument('--csv', action='store_true', help='CSV output.')
     output_group.add_argument('--plain', action='store_true', help='Plain text output.')
     output_group.add_argument('--output', type=str, metavar='FILE', help='Save output to FILE.')
+    output_group.add_argument('--compress', choices=list(COMPRESSION_FORMATS), help='Compress --output with gzip, bz2 or xz (adds .gz/.bz2/.xz).')
+    output_group.add_argument('--shard-size', type=int, metavar='N', help='Split --output into numbered files of at most N keys, plus a .manifest.json with counts and SHA-256 checksums.')
     output_group.add_argument('--copy', action='store_true', help='Copy output to clipboard.')
     output_group.add_argument('--encrypt', type=str, metavar='PASS', nargs='?', const=True, help='Encrypt output file with a password.')
     output_group.add_argument('--decrypt', type=str, metavar='FILE', help='Decrypt an encrypted file.')
     output_group.add_argument('--show-decrypted', action='store_true', help='Show decrypted content in terminal.')
     output_group.add_argument('--output-decrypted', type=str, metavar='FILE', help='Save decrypted content to a new file.')
 
+    perf_group = parser.add_argument_group('Performance')
+    perf_group.add_argument('--workers', type=int, metavar='N', default=1, help='Generate with N worker processes (0 = one per CPU core).')
+    perf_group.add_argument('--seed', type=int, metavar='N', help='With --insecure-fast, derive all randomness from seed N: the same seed gives byte-identical output.')
+    perf_group.add_argument('--insecure-fast', action='store_true', help='INSECURE: use a seeded NumPy PRNG instead of the OS CSPRNG, for reproducible test fixtures only. Needs --seed.')
+    perf_group.add_argument('--unordered', action='store_true', help='With --workers, write batches as soon as they finish instead of in order.')
+
+    audit_group = parser.add_argument_group('Password Audit')
+    audit_group.add_argument('--audit', type=str, metavar='FILE', help="Audit the passwords in FILE ('-' for stdin), one per line. Add --csv/--ndjson for per-line records.")
+
+    jobs_group = parser.add_argument_group('Batch Jobs')
+    jobs_group.add_argument('--jobs', type=str, metavar='FILE', help='Run every generation job in the JSON file FILE in one process, then print a summary.')
+    jobs_group.add_argument('--parallel-jobs', type=int, metavar='N', default=1, help='With --jobs, run up to N jobs at the same time (default: 1).')
+
+    server_group = parser.add_argument_group('Key Server')
+    server_group.add_argument('--serve', action='store_true', help='Run a key server that hands out keys from pre-generated pools.')
+    server_group.add_argument('--host', type=str, default='127.0.0.1', help='HTTP listen address (default: 127.0.0.1).')
+    server_group.add_argument('--port', type=int, default=8765, help='HTTP listen port (default: 8765).')
+    server_group.add_argument('--socket', type=str, metavar='PATH', help='Listen on a Unix socket at PATH instead of HTTP.')
+    server_group.add_argument('--profiles', type=str, default=','.join(DEFAULT_SERVER_PROFILES), help='Comma-separated pool profiles, e.g. "wifi,bank,uuid,words:6,pin:6,pattern:AA-9999".')
+    server_group.add_argument('--pool-size', type=int, metavar='N', default=1000, help='Keys kept ready per profile (default: 1000).')
+
     misc_group = parser.add_argument_group('Miscellaneous')
     misc_group.add_argument('--theme', choices=THEMES.keys(), help='Set color theme and save preference.')
     misc_group.add_argument('--stats', action='store_true', help='Show generation statistics.')
-    misc_group.add_argument('--benchmark', type=int, metavar='N', nargs='?', const=1000, help='Run a generation benchmark for N keys.')
+    misc_group.add_argument('--benchmark', type=int, metavar='N', nargs='?', const=10000, help='Run the benchmark suite with N keys per case (default 10000).')
+    misc_group.add_argument('--benchmark-repeat', type=int, metavar='N', default=5, help='Timed trials per benchmark case (default 5).')
+    misc_group.add_argument('--benchmark-filter', type=str, metavar='TEXT', help='Only run benchmark cases whose name contains TEXT.')
+    misc_group.add_argument('--benchmark-json', type=str, metavar='FILE', help="Write benchmark results as JSON to FILE ('-' for stdout).")
+    misc_group.add_argument('--benchmark-baseline', type=str, metavar='FILE', help='Compare against a saved --benchmark-json file.')
+    misc_group.add_argument('--benchmark-threshold', type=float, metavar='PCT', default=10.0, help='Throughput drop (percent) vs. the baseline that counts as a regression (default 10).')
+    misc_group.add_argument('--profile', action='store_true', help='Print per-stage timings, call counts, peak memory and bytes written to stderr when the run ends.')
+    misc_group.add_argument('--profile-json', type=str, metavar='FILE', help="Also write the --profile report as JSON to FILE ('-' for stdout); implies --profile.")
     misc_group.add_argument('--animate', action='store_true', help='Enable typing animation for output.')
-    parser.add_argument('--version', action='version', version='%(prog)s 2.0')
-    
-    args = parser.parse_args()
+    parser.add_argument('--version', action='version', version=f'%(prog)s {KEYGEN_VERSION}')
+    return parser
+
+def main():
+    global color_map
+    config_started = time.perf_counter()
+    config = load_config()
+    config_seconds = time.perf_counter() - config_started
+    color_map = THEMES.get(current_theme, THEMES['default'])
+    args = build_parser().parse_args()
+
+    profiler = None
+    if args.profile or args.profile_json:
+        # Imports and the config load happen before any hook can be attached, so they are reported afterwards.
+        profiler = add_profile_hook(StageProfiler())
+        profiler.started = _module_started
+        profiler('import', config_started - _module_started)
+        profiler('load_config', config_seconds)
+    try:
+        run_command(args, config)
+    finally:
+        if profiler:
+            remove_profile_hook(profiler)
+            print_profile_report(profiler.report(), args.profile_json)
 
+def run_command(args, config):
+    global color_map, current_theme
     # Handle decryption mode first
     if args.decrypt:
         if not os.path.exists(args.decrypt):
             print_colored(f"Error: Decryption file '{args.decrypt}' not found.", 'error')
             sys.exit(1)
-        password = getpass.getpass("Enter decryption password: ")
+        password = require('getpass').getpass("Enter decryption password: ")
+        if not args.show_decrypted and not args.output_decrypted:
+            print_colored("Decrypted content not displayed or saved. Use --show-decrypted or --output-decrypted.", 'info')
+            sys.exit(0)
+        # Decrypted chunks are streamed to the terminal and/or a temporary file that only replaces
+        # --output-decrypted once the whole file has been authenticated.
+        tmp_path = args.output_decrypted + '.tmp' if args.output_decrypted else None
         try:
-            decrypted_content = decrypt_file(args.decrypt, password)
-            if args.show_decrypted:
-                print_colored("--- Decrypted Content ---", 'header')
-                print(decrypted_content)
-                print_colored("-------------------------", 'header')
-            if args.output_decrypted:
-                with open(args.output_decrypted, 'w', encoding='utf-8') as f:
-                    f.write(decrypted_content)
+            with open(tmp_path, 'wb') if tmp_path else nullcontext() as out:
+                if args.show_decrypted: print_colored("--- Decrypted Content ---", 'header')
+                sys.stdout.flush()
+                for chunk in iter_decrypted_chunks(args.decrypt, password):
+                    if args.show_decrypted: sys.stdout.buffer.write(chunk)
+                    if tmp_path: out.write(chunk)
+                if args.show_decrypted:
+                    sys.stdout.buffer.flush()
+                    print()
+                    print_colored("-------------------------", 'header')
+            if tmp_path:
+                os.replace(tmp_path, args.output_decrypted)
                 print_colored(f"Decrypted content saved to {args.output_decrypted}", 'info')
-            if not args.show_decrypted and not args.output_decrypted:
-                print_colored("Decrypted content not displayed or saved. Use --show-decrypted or --output-decrypted.", 'info')
         except ValueError as e:
+            if tmp_path and os.path.exists(tmp_path): os.remove(tmp_path)
             print_colored(f"Decryption Error: {e}", 'error')
         sys.exit(0)
 
     if args.theme:
+        changed = args.theme != config.get('settings', 'theme', fallback=None)
         current_theme = args.theme
         color_map = THEMES[current_theme]
-        if 'settings' not in config: config.add_section('settings')
-        config.set('settings', 'theme', current_theme)
-        save_config(config)
+        if changed: # The INI is only written when a setting actually changes
+            if 'settings' not in config: config.add_section('settings')
+            config.set('settings', 'theme', current_theme)
+            save_config(config)
         print_colored(f"Theme set to '{current_theme}'.", 'info')
 
     if args.update_dictionaries:
-        update_dictionaries()
-        sys.exit(0)
+        sources = None
+        if args.dictionary_url:
+            try:
+                sources = dict(entry.split('=', 1) for entry in args.dictionary_url)
+            except ValueError:
+                print_colored("Error: --dictionary-url expects LANG=URL.", 'error')
+                sys.exit(1)
+        sys.exit(0 if update_dictionaries(sources) else 1)
         
     if args.benchmark is not None:
-        run_benchmark(args)
-        sys.exit(0)
+        sys.exit(0 if run_benchmark(args) else 1)
+
 
     if args.stats:
         show_stats(config)
@@ -340,141 +2810,16 @@ def main():
 
     # --- Generation Logic ---
     try:
-        if args.wifi:
-            args.pattern = 'AANS-AANS-AANS-AANS' # WPA2-Personal typically 8-63 chars, complex. Sets pattern.
-            args.length = 16 # Explicitly set length for presets
-        if args.bank:
-            args.pattern = 'ANANANANAN' # Example bank pattern: letters, numbers. Simplified.
-            args.length = 10 # Explicitly set length for presets
-        if args.memorable: args.pattern = '[wordEN]-[wordEN]-99S'
-        
-        mode = 'default'
-        if args.words: mode = 'words'
-        elif args.pattern: mode = 'pattern'
-        elif args.uuid: mode = 'uuid'
-        elif args.ulid: mode = 'ulid'
-        elif args.nano_id: mode = 'nano_id'
-        elif args.hex is not None: mode = 'hex'
-        elif args.pin is not None: mode = 'pin'
-
-        generated_items = []
-        should_animate = args.animate and not any([args.json, args.csv, args.plain, args.output])
-        
-        if should_animate and args.keys > 5:
-            print_colored("Warning: Animation with many keys might take a long time.", 'info')
-            time.sleep(1) # Give user time to read warning
-        
-        for _ in range(args.keys):
-            key, entropy, strength = "", 0, "N/A"
-            char_set_for_entropy = ""
-
-            if mode == 'words':
-                key = generate_passphrase(args.words, args.lang)
-                # Word-based passphrases have their own entropy calculation,
-                # but for simplicity of uniform output structure, we'll assign
-                # a high value if words are from a sufficiently large dictionary.
-                # Assuming EFF wordlist is ~7776 words.
-                entropy = args.words * math.log2(7776) if args.words > 0 else 0
-            elif mode == 'pattern':
-                key, char_set_for_entropy = generate_from_pattern(args.pattern)
-            elif mode == 'uuid':
-                key = str(uuid.uuid4())
-                entropy = 122 # UUIDv4 has 122 random bits
-            elif mode == 'ulid':
-                key = str(ulid.new())
-                entropy = 128 # ULID has 128 bits of entropy (time + randomness)
-            elif mode == 'nano_id':
-                key = nanoid.generate(size=args.length if args.length != 12 else 21) # NanoID default size 21
-                # NanoID uses a 64-character alphabet by default.
-                # Entropy = length * log2(alphabet_size)
-                entropy = len(key) * math.log2(64)
-            elif mode == 'hex':
-                if args.hex <= 0: raise ValueError("Hex key length must be a positive integer.")
-                key = secrets.token_hex(math.ceil(args.hex / 2))[:args.hex]
-                char_set_for_entropy = string.hexdigits
-            elif mode == 'pin':
-                if args.pin <= 0: raise ValueError("PIN length must be a positive integer.")
-                key = ''.join(secrets.choice(string.digits) for _ in range(args.pin))
-                char_set_for_entropy = string.digits
-            else: # mode == 'default' (includes wifi/bank presets which set args.pattern)
-                # Only apply default char types if no other explicit generation options are set.
-                if not (args.letters or args.numbers or args.special or args.custom or args.pattern): # FIX: added args.pattern here
-                    args.letters = args.numbers = args.special = True
-                key, char_set_for_entropy = generate_password(args.length, args.letters, args.numbers, args.special, args.custom)
-
-            key = apply_case(key, args.case)
-            
-            # Recalculate entropy for default/pattern if not set by specific modes
-            if mode not in ['words', 'uuid', 'ulid', 'nano_id'] and char_set_for_entropy:
-                entropy = calculate_entropy(key, char_set_for_entropy)
-            
-            strength = get_entropy_strength(entropy)
-            generated_items.append({"key": key, "entropy_bits": round(entropy, 2), "strength": strength})
-            session_generation_count += 1
-
-        if should_animate: typing_animation("--- Generated Items ---", 0.01)
-        for i, item in enumerate(generated_items):
-            output_str = f"  {i+1:02d}: {item['key']}"
-            if item['entropy_bits'] > 0: output_str += f" (Entropy: {item['entropy_bits']} bits - {item['strength']})"
-            if should_animate: typing_animation(output_str)
-            elif not any([args.json, args.csv, args.plain, args.output]): print_colored(output_str, 'key_output')
-        if should_animate: typing_animation("-----------------------", 0.01)
-
-        # --- Output Handling ---
-        output_content = ""
-        if args.json:
-            output_content = json.dumps(generated_items, indent=2)
-        elif args.csv:
-            from io import StringIO
-            s_io = StringIO()
-            if mode == 'words': # Specific handling for passphrases
-                writer = csv.writer(s_io)
-                writer.writerow(["passphrase", "entropy_bits", "strength"]) # Correct header for passphrases
-                for item in generated_items:
-                    writer.writerow([item['key'], item['entropy_bits'], item['strength']]) # Extract only the 'key' value
-            elif generated_items and isinstance(generated_items[0], dict): # All other cases with structured output
-                fieldnames = list(generated_items[0].keys())
-                writer = csv.DictWriter(s_io, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(generated_items)
-            else: # Fallback for any other non-dict items (shouldn't happen with current design)
-                writer = csv.writer(s_io)
-                writer.writerow(["item"])
-                for item in generated_items:
-                    writer.writerow([item])
-            output_content = s_io.getvalue()
-        elif args.plain or (args.output and not any([args.json, args.csv])): # plain output or default for file output
-            output_content = "\n".join([item["key"] for item in generated_items])
-
-        if output_content and not should_animate and not args.output and not any([args.json, args.csv, args.plain]):
-            # This block is for default print if no output format and no animation
-            for item in generated_items:
-                output_str = f"{item['key']}" # default no prefix
-                print_colored(output_str, 'key_output')
-        elif output_content and not args.output: # Print to console for explicit json/csv/plain if not writing to file
-             print(output_content)
-
-
-        if args.output:
-            with open(args.output, 'w', encoding='utf-8') as f: f.write(output_content)
-            print_colored(f"Output saved to {args.output}", 'info')
-            if args.encrypt:
-                password = args.encrypt if isinstance(args.encrypt, str) else getpass.getpass("Enter encryption password: ")
-                encrypt_file(args.output, password)
-                os.remove(args.output) # Remove unencrypted file
-
-        if args.copy:
-            pyperclip.copy("\n".join([item["key"] for item in generated_items]))
-            print_colored("Generated item(s) copied to clipboard.", 'info')
-
+        if args.serve: run_server(args)
+        elif args.audit: run_audit(args)
+        elif args.jobs:
+            if not run_jobs(args): sys.exit(1)
+        else: run_generation(args)
     except Exception as e:
         print_colored(f"Error: {e}", 'error')
         sys.exit(1)
     finally:
-        if 'statistics' not in config: config.add_section('statistics')
-        total_gens = config.getint('statistics', 'generation_count', fallback=0)
-        config.set('statistics', 'generation_count', str(total_gens + session_generation_count))
-        save_config(config)
+        flush_session_stats(config)
 
 if __name__ == "__main__":
     if os.name == 'nt': os.system('')
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+
+import keygen
+
+@pytest.fixture
+def word_list(tmp_path, monkeypatch):
+    # A throwaway dictionary directory; the word cache and pattern cache start empty.
+    monkeypatch.setattr(keygen, 'DICTIONARIES_DIR', str(tmp_path))
+    monkeypatch.setattr(keygen, '_word_cache', {})
+    keygen.compile_pattern.cache_clear()
+    def write(lang, size):
+        (tmp_path / f'{lang.upper()}.txt').write_text(''.join(f'w{i:05d}\n' for i in range(size)), encoding='utf-8')
+    yield write
+    keygen.compile_pattern.cache_clear()
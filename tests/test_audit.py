@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+import keygen
+
+def audit(tmp_path, *options):
+    source = tmp_path / 'passwords.txt'
+    source.write_text('hunter2\ncorrect horse battery staple\nZ9!kq#Lm2@Xv\n')
+    return keygen.run_audit(keygen.build_parser().parse_args(['--audit', str(source)] + list(options)))
+
+def test_bare_output_saves_csv(tmp_path):
+    output = tmp_path / 'report.txt'
+    stats = audit(tmp_path, '--output', str(output))
+    lines = output.read_text().splitlines()
+    assert lines[0] + '\n' == keygen.AUDIT_CSV_HEADER
+    assert [line.split(',')[0] for line in lines[1:]] == ['1', '2', '3']
+    assert stats['total'] == 3
+
+def test_ndjson_output(tmp_path):
+    output = tmp_path / 'report.ndjson'
+    audit(tmp_path, '--ndjson', '--output', str(output))
+    assert [json.loads(line)['line'] for line in output.read_text().splitlines()] == [1, 2, 3]
+
+@pytest.mark.parametrize('option', ['--json', '--plain'])
+def test_record_formats_other_than_csv_ndjson_rejected(tmp_path, option):
+    with pytest.raises(ValueError, match='--csv or --ndjson'):
+        audit(tmp_path, option, '--output', str(tmp_path / 'report.txt'))
@@ -0,0 +1,50 @@
+import os
+
+import keygen
+
+def mapped_words(lang):
+    # The first load parses the text list and compiles it; once evicted, the next load maps the compiled file.
+    keygen.load_words(lang)
+    keygen.release_words(lang)
+    words = keygen.load_words(lang)
+    assert isinstance(words, keygen.MappedWordList)
+    return words
+
+def test_round_trip_through_compiled_dictionary(word_list):
+    word_list('xx', 300)
+    assert list(mapped_words('xx')) == [f'w{i:05d}' for i in range(300)]
+
+def test_reload_keeps_earlier_lists_usable(word_list, tmp_path):
+    word_list('xx', 300)
+    old = mapped_words('xx')
+    pattern = keygen.compile_pattern('[wordXX]-99')
+    stat = os.stat(tmp_path / 'XX.kcd')
+    os.utime(tmp_path / 'XX.kcd', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert keygen.load_words('xx') is not old
+    assert len(pattern.render(100)) == 100
+    assert old[0] == 'w00000'
+
+def test_install_keeps_earlier_lists_usable(word_list, tmp_path):
+    word_list('xx', 300)
+    old = mapped_words('xx')
+    download = tmp_path / 'download.txt'
+    download.write_text('alpha\nbravo\ncharlie\n', encoding='utf-8')
+    assert keygen._install_dictionary('xx', str(download)) == 3
+    assert list(keygen.load_words('xx')) == ['alpha', 'bravo', 'charlie']
+    assert old[299] == 'w00299'
+
+def test_replaced_list_with_older_mtime_is_recompiled(word_list, tmp_path):
+    # A restored or `cp -p`-ed list can be older than the .kcd built from the previous one.
+    (tmp_path / 'QQ.txt').write_text('alpha\nbravo\n', encoding='utf-8')
+    assert sorted(mapped_words('qq')) == ['alpha', 'bravo']
+    older = os.stat(tmp_path / 'QQ.kcd').st_mtime_ns - 10**9
+    (tmp_path / 'QQ.txt').write_text('zulu\nyankee\n', encoding='utf-8')
+    os.utime(tmp_path / 'QQ.txt', ns=(older, older))
+    assert sorted(keygen.load_words('qq')) == ['yankee', 'zulu']
+    keygen.release_words('qq')
+    assert sorted(mapped_words('qq')) == ['yankee', 'zulu']
+
+def test_old_format_dictionary_is_rebuilt(word_list, tmp_path):
+    word_list('xx', 10)
+    (tmp_path / 'XX.kcd').write_bytes(b'KCDICT1\n' + bytes(8))
+    assert len(mapped_words('xx')) == 10
@@ -0,0 +1,82 @@
+import base64
+import os
+
+import pytest
+
+import keygen
+
+def encrypt(path, data, chunk_size=64):
+    with keygen.EncryptingSink(open(path, 'wb'), 'pw', chunk_size=chunk_size, iterations=1) as sink:
+        sink.write(data)
+
+def decrypt(path, password='pw'):
+    return b''.join(keygen.iter_decrypted_chunks(str(path), password))
+
+def frame_offsets(path):
+    # Byte offsets where each frame starts, after the container header.
+    offsets, data = [], path.read_bytes()
+    position = keygen._ENCRYPTION_HEADER.size
+    while position < len(data):
+        offsets.append(position)
+        position += keygen._FRAME_LENGTH.size + keygen._FRAME_LENGTH.unpack_from(data, position)[0]
+    return offsets
+
+@pytest.mark.parametrize('data', [b'', b'x', os.urandom(64), os.urandom(1000)])
+def test_round_trip(tmp_path, data):
+    path = tmp_path / 'keys.enc'
+    encrypt(path, data)
+    assert decrypt(path) == data
+
+def test_wrong_password(tmp_path):
+    path = tmp_path / 'keys.enc'
+    encrypt(path, b'secret keys')
+    with pytest.raises(ValueError):
+        decrypt(path, 'other')
+
+def test_truncated_at_frame_boundary(tmp_path):
+    # Every frame but the last is sealed as non-final, so dropping trailing frames fails authentication.
+    path = tmp_path / 'keys.enc'
+    encrypt(path, os.urandom(1000))
+    for offset in frame_offsets(path)[1:]:
+        truncated = tmp_path / 'truncated.enc'
+        truncated.write_bytes(path.read_bytes()[:offset])
+        with pytest.raises(ValueError):
+            decrypt(truncated)
+
+def test_truncated_mid_frame(tmp_path):
+    path = tmp_path / 'keys.enc'
+    encrypt(path, os.urandom(1000))
+    path.write_bytes(path.read_bytes()[:-5])
+    with pytest.raises(ValueError):
+        decrypt(path)
+
+def test_aborted_sink_never_authenticates(tmp_path):
+    path = tmp_path / 'keys.enc'
+    sink = keygen.EncryptingSink(open(path, 'wb'), 'pw', chunk_size=64, iterations=1)
+    sink.write(os.urandom(1000))
+    sink.abort()
+    assert sink.closed
+    with pytest.raises(ValueError):
+        decrypt(path)
+
+def test_legacy_fernet_file(tmp_path):
+    fernet = pytest.importorskip('cryptography.fernet')
+    salt = os.urandom(16)
+    key = base64.urlsafe_b64encode(keygen.derive_key('pw', salt))
+    path = tmp_path / 'legacy.enc'
+    path.write_bytes(salt + fernet.Fernet(key).encrypt(b'one\ntwo\n'))
+    assert keygen.decrypt_file(str(path), 'pw') == 'one\ntwo\n'
+
+def failing_batches(*args, **kwargs):
+    for items in keygen.iter_batches(keygen.build_spec(keygen.build_parser().parse_args([]), 'default'), 2000):
+        yield len(items), items, None
+    raise RuntimeError('generation failed')
+
+@pytest.mark.parametrize('options', [[], ['--shard-size', '500'], ['--compress', 'gzip']])
+def test_failed_run_leaves_no_output(tmp_path, monkeypatch, options):
+    monkeypatch.setattr(keygen, 'produce_batches', failing_batches)
+    output = tmp_path / 'keys.txt'
+    args = keygen.build_parser().parse_args(['-k', '5000', '--encrypt', 'pw', '--output', str(output)] + options)
+    with pytest.raises(RuntimeError):
+        keygen.run_generation(args)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,62 @@
+import os
+import time
+import uuid
+
+import pytest
+
+import keygen
+
+def crockford(value, digits=16):
+    # Reference encoder: repeated divmod by 32, most significant digit first.
+    out = []
+    for _ in range(digits):
+        value, digit = divmod(value, 32)
+        out.append('0123456789ABCDEFGHJKMNPQRSTVWXYZ'[digit])
+    return ''.join(reversed(out))
+
+class FixedClock:
+    # A CSPRNG source pinned to one millisecond, like the seeded runs use.
+    def __init__(self, millis):
+        self.millis = millis
+
+    def __call__(self, n):
+        return os.urandom(n)
+
+@pytest.mark.parametrize('version, generate', [(4, keygen.generate_uuid4_batch), (7, keygen.generate_uuid7_batch)])
+def test_uuid_version_and_variant(version, generate):
+    for text in generate(2000):
+        parsed = uuid.UUID(text)
+        assert str(parsed) == text
+        assert parsed.version == version
+        assert parsed.variant == uuid.RFC_4122
+
+def test_uuid7_carries_current_millis():
+    before = time.time_ns() // 1_000_000
+    ids = keygen.generate_uuid7_batch(100)
+    after = time.time_ns() // 1_000_000
+    assert all(before <= uuid.UUID(text).int >> 80 <= after for text in ids)
+
+def test_spread_base32_matches_reference_encoder():
+    values = [0, 1, 31, 32, (1 << 80) - 1, 1 << 79] + [int.from_bytes(os.urandom(10), 'big') for _ in range(500)]
+    digits = keygen._spread_base32(values).translate(keygen._CROCKFORD_LOW_BITS).decode('ascii')
+    assert [digits[i:i + 16] for i in range(0, len(digits), 16)] == [crockford(value) for value in values]
+
+def test_ulid_timestamp_and_randomness_encoding():
+    clock = FixedClock(1_700_000_000_123)
+    millis, values = keygen.MonotonicUlidClock().reserve(50, clock)
+    assert keygen._ulid_strings(millis, keygen._spread_base32(values)) == [crockford(millis, 10) + crockford(value) for value in values]
+
+def test_monotonic_ulids_increase_across_calls():
+    ids = []
+    for _ in range(20): ids += keygen.generate_ulid_batch(500, True)
+    assert all(a < b for a, b in zip(ids, ids[1:]))
+
+def test_monotonic_ulids_roll_into_next_millisecond():
+    clock, source = keygen.MonotonicUlidClock(), FixedClock(1_700_000_000_000)
+    millis, values = clock.reserve(1, source)
+    first = keygen._ulid_strings(millis, keygen._spread_base32(values))
+    clock.last_random = (1 << 80) - 2 # Next step overflows the 80-bit random part
+    millis, values = clock.reserve(100, source)
+    assert millis == source.millis + 1
+    ids = first + keygen._ulid_strings(millis, keygen._spread_base32(values))
+    assert all(a < b for a, b in zip(ids, ids[1:]))
@@ -0,0 +1,28 @@
+import pytest
+
+import keygen
+
+# 256 and 65536 fill the whole 1- and 2-byte span, so rejection sampling keeps every draw.
+@pytest.mark.parametrize('size', [2, 10, 255, 256, 257, 65535, 65536, 65537])
+def test_random_indices_in_range(size):
+    indices = keygen.random_indices(20000, size)
+    assert len(indices) == 20000
+    assert 0 <= min(indices) and max(indices) < size
+
+def test_random_indices_full_byte_span_uses_every_value():
+    assert set(keygen.random_indices(20000, 256)) == set(range(256))
+
+@pytest.mark.parametrize('char_set', ['0123456789', 'ab', ''.join(map(chr, range(256))), ''.join(map(chr, range(300)))])
+def test_random_string_stays_in_alphabet(char_set):
+    assert set(keygen.random_string(5000, char_set)) <= set(char_set)
+
+def test_pattern_with_full_byte_word_list(word_list):
+    word_list('xx', 256)
+    keys = keygen.compile_pattern('[wordXX]-99').render(2000)
+    assert len(keys) == 2000 and all(len(key) == 9 for key in keys)
+
+def test_passphrase_sampler_crosses_full_byte_span(word_list):
+    # Drawing without replacement walks the population down through 256.
+    word_list('xx', 300)
+    phrases = keygen.generate_passphrase_batch(200, 60, 'xx')
+    assert all(len(set(phrase.split('-'))) == 60 for phrase in phrases)
@@ -0,0 +1,28 @@
+import pytest
+
+import keygen
+
+pytest.importorskip('numpy')
+
+KEYS = keygen.GENERATION_BATCH_SIZE * 2 + 500 # Enough batches for --workers to fan out
+
+def seeded_run(tmp_path, name, options):
+    output = tmp_path / name
+    args = keygen.build_parser().parse_args(['-k', str(KEYS), '--insecure-fast', '--output', str(output)] + options)
+    keygen.run_generation(args)
+    return output.read_bytes()
+
+@pytest.mark.parametrize('mode', [[], ['--uuid'], ['--uuid7'], ['--ulid', '--monotonic'], ['--pattern', 'AA-99-xx']])
+def test_seed_gives_identical_bytes_across_runs_and_workers(tmp_path, mode):
+    first = seeded_run(tmp_path, 'first.txt', ['--seed', '7'] + mode)
+    assert len(first.splitlines()) == KEYS
+    assert seeded_run(tmp_path, 'second.txt', ['--seed', '7'] + mode) == first
+    assert seeded_run(tmp_path, 'parallel.txt', ['--seed', '7', '--workers', '2'] + mode) == first
+    assert seeded_run(tmp_path, 'other.txt', ['--seed', '8'] + mode) != first
+
+def test_seeded_batches_repeat(word_list):
+    word_list('xx', 500)
+    spec = keygen.build_spec(keygen.build_parser().parse_args(['--words', '4', '--lang', 'xx', '--seed', '3', '--insecure-fast']), 'words')
+    batch = keygen.generate_batch(spec, 1000, keygen.SeededRandom(3))
+    assert keygen.generate_batch(spec, 1000, keygen.SeededRandom(3)) == batch
+    assert keygen.generate_batch(spec, 1000, keygen.SeededRandom(3, 1)) != batch
@@ -0,0 +1,43 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SRC_DIR
+
+# Modules a plain `keygen -k 1` run must not import. Wall-clock import time depends on the host, so the
+# millisecond budget for the script's own imports is only checked when KEYGEN_STARTUP_BUDGET_MS sets one.
+DEFERRED_MODULES = ('requests', 'pyperclip', 'cryptography', 'json', 'csv', 'uuid', 'getpass', 'numpy', 'concurrent.futures')
+STARTUP_IMPORT_BUDGET_MS = os.environ.get('KEYGEN_STARTUP_BUDGET_MS')
+
+def import_times(tmp_path):
+    # Runs a copy of the script, so its config and statistics files land in tmp_path.
+    script = shutil.copy(os.path.join(SRC_DIR, 'keygen.py'), tmp_path)
+    result = subprocess.run([sys.executable, '-X', 'importtime', script, '-k', '1', '--plain'],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    assert result.returncode == 0, result.stderr
+    # -X importtime lines look like "import time: self | cumulative | name", nested imports are indented.
+    # Everything logged after `site` was imported by keygen itself.
+    entries = []
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)', line)
+        if not match: continue
+        depth = len(match.group(3)) // 2
+        if match.group(4) == 'site' and depth == 0:
+            entries = []
+            continue
+        entries.append((int(match.group(2)), depth, match.group(4)))
+    return entries
+
+def test_plain_run_defers_heavy_imports(tmp_path):
+    loaded = {name for _, _, name in import_times(tmp_path) if name.split('.')[0] in DEFERRED_MODULES or name in DEFERRED_MODULES}
+    assert not loaded
+
+@pytest.mark.skipif(not STARTUP_IMPORT_BUDGET_MS, reason='set KEYGEN_STARTUP_BUDGET_MS to check the import-time budget')
+def test_plain_run_import_budget(tmp_path):
+    # The best of three runs, so one slow disk read on a busy host does not fail the check.
+    total_ms = min(sum(cumulative for cumulative, depth, _ in import_times(tmp_path) if depth == 0) / 1000 for _ in range(3))
+    assert total_ms <= float(STARTUP_IMPORT_BUDGET_MS)
@@ -0,0 +1,69 @@
+import os
+import tempfile
+
+import pytest
+
+import keygen
+
+def spec(**overrides):
+    args = keygen.build_parser().parse_args([])
+    for name, value in overrides.items(): setattr(args, name, value)
+    return keygen.build_spec(args, keygen.resolve_mode(args))
+
+def unique_keys(spec, total, memory_keys, workers=1):
+    unique = keygen.UniqueFilter(total, memory_keys)
+    keys = [item['key'] for _, items, _ in keygen.iter_unique_batches(spec, total, unique, workers) for item in items]
+    return keys, unique
+
+@pytest.mark.parametrize('total, memory_keys', [(5000, 10000), (5000, 300), (9000, 500)])
+def test_keys_are_exactly_unique(total, memory_keys):
+    # A 10,000-key space forces many collisions; a small memory_keys switches to Bloom mode with spill runs.
+    keys, unique = unique_keys(spec(pattern='9999'), total, memory_keys)
+    assert len(keys) == total
+    assert len(set(keys)) == total
+    assert unique.stats['duplicates'] > 0
+    if memory_keys < total:
+        assert unique.bloom is not None and unique.stats['spilled_runs'] > 0
+
+def test_whole_keyspace():
+    keys, _ = unique_keys(spec(pin=3), 1000, 100)
+    assert sorted(keys) == [f'{i:03d}' for i in range(1000)]
+
+def test_spill_files_are_removed(tmp_path, monkeypatch):
+    monkeypatch.setenv('TMPDIR', str(tmp_path))
+    monkeypatch.setattr(tempfile, 'tempdir', None)
+    unique_keys(spec(pattern='9999'), 5000, 300)
+    assert os.listdir(tmp_path) == []
+
+def test_keyspace_is_enforced():
+    with pytest.raises(ValueError):
+        keygen.unique_keyspace(spec(pattern='99'), 101)
+
+@pytest.mark.parametrize('options, keyspace', [
+    ({'custom': 'abc', 'length': 2, 'case': 'random'}, 36),
+    ({'custom': 'aA', 'length': 3, 'case': 'alternating'}, 1),
+    ({'custom': 'aAb', 'length': 2, 'case': 'upper'}, 4),
+    ({'pattern': 'a-9', 'case': 'random'}, 20),
+    ({'hex': 2, 'case': 'random'}, 22 ** 2),
+])
+def test_keyspace_counts_case(options, keyspace):
+    assert keygen.spec_keyspace(spec(**options)) == keyspace
+
+def test_random_case_keyspace_can_be_exhausted():
+    keys, _ = unique_keys(spec(custom='abc', length=2, case='random'), 36, 100)
+    assert len(set(keys)) == 36
+
+def test_key_generator_unique_iteration():
+    generator = keygen.KeyGenerator(pin=2, unique=True)
+    keys = [item['key'] for item in generator.iter_items(100)]
+    assert sorted(keys) == [f'{i:02d}' for i in range(100)]
+    assert len(set(generator.generate_many(100))) == 100
+
+def test_key_generator_unique_needs_a_bound():
+    generator = keygen.KeyGenerator(pin=1, unique=True)
+    with pytest.raises(TypeError):
+        generator.generate()
+    with pytest.raises(TypeError):
+        next(iter(generator.iter_items()))
+    with pytest.raises(TypeError):
+        iter(generator)
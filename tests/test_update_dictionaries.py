@@ -0,0 +1,82 @@
+import hashlib
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import keygen
+
+pytest.importorskip('requests')
+
+LISTS = {'/shared.txt': b'11111\talpha\n11112\tbravo\n11113\tcharlie\n', '/cz.txt': b'ahoj\nsvet\n'}
+
+class StandIn(BaseHTTPRequestHandler):
+    # Serves LISTS with ETags and answers 304 to a matching If-None-Match; any other path fails with 500.
+    requests = Counter()
+    not_modified = Counter()
+
+    def do_GET(self):
+        self.requests[self.path] += 1
+        body = LISTS.get(self.path)
+        if body is None:
+            self.send_error(500)
+            return
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.not_modified[self.path] += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    StandIn.requests.clear()
+    StandIn.not_modified.clear()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def dictionaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(keygen, 'DICTIONARIES_DIR', str(tmp_path))
+    monkeypatch.setattr(keygen, '_word_cache', {})
+    return tmp_path
+
+def test_shared_url_is_fetched_once(server, dictionaries):
+    sources = {lang: server + '/shared.txt' for lang in ('en', 'de', 'fr')}
+    sources['cz'] = server + '/cz.txt'
+    assert keygen.update_dictionaries(sources)
+    assert StandIn.requests == {'/shared.txt': 1, '/cz.txt': 1}
+    for lang in ('en', 'de', 'fr'):
+        assert list(keygen.load_words(lang)) == ['alpha', 'bravo', 'charlie']
+    assert list(keygen.load_words('cz')) == ['ahoj', 'svet']
+
+def test_unchanged_list_is_skipped_with_304(server, dictionaries, capsys):
+    sources = {'en': server + '/shared.txt'}
+    assert keygen.update_dictionaries(sources)
+    installed = (dictionaries / 'EN.txt').stat().st_mtime_ns
+    assert keygen.update_dictionaries(sources)
+    assert StandIn.requests['/shared.txt'] == 2
+    assert StandIn.not_modified['/shared.txt'] == 1
+    assert 'EN: up to date.' in capsys.readouterr().out
+    assert (dictionaries / 'EN.txt').stat().st_mtime_ns == installed
+
+def test_failed_download_keeps_installed_list(server, dictionaries):
+    assert keygen.update_dictionaries({'en': server + '/shared.txt'})
+    before = (dictionaries / 'EN.txt').read_bytes()
+    assert not keygen.update_dictionaries({'en': server + '/missing.txt'})
+    assert (dictionaries / 'EN.txt').read_bytes() == before
+    assert list(keygen.load_words('en')) == ['alpha', 'bravo', 'charlie']
+    assert not [name for name in keygen.os.listdir(dictionaries) if name.startswith('.download') or name.endswith('.tmp')]